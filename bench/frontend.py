@@ -0,0 +1,181 @@
+"""
+Measures how the stages that read and compile a program (lexing, parsing
+and compiling to JavaScript) scale with the size and shape of the program:
+
+    python3 -m bench.frontend                   # Print the results
+    python3 -m bench.frontend -o frontend.json  # ... and save them
+
+Each stage is run on programs made by bench.generate, with the previous
+stage's output as its input.  For each stage it reports the best time of
+--repeat runs, how many tokens (for lexing) or expression nodes (for
+parsing and compiling) it handled per second, and the peak memory it
+allocated, measured by tracemalloc in a separate run.
+
+A stage that fails (e.g. compiling an expression nested more deeply than
+Python's recursion limit allows) is reported as failed, along with why.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from pycell.compile_ import compile_list
+from pycell.env import Env
+from pycell.lexer import lex
+from pycell.parser import parse
+
+from bench.generate import generate, shape_names
+
+
+# The programs to measure: (shape, size)
+corpora = (
+    ("deep", 50),
+    ("deep", 500),
+    ("chains", 100),
+    ("chains", 1000),
+    ("defs", 1000),
+    ("defs", 10000),
+    ("strings", 100),
+    ("strings", 1000),
+)
+
+
+def count_nodes(exprs):
+    ret = 0
+    todo = list(exprs)
+    while len(todo) > 0:
+        expr = todo.pop()
+        ret += 1
+        typ = expr[0]
+        if typ == "call":
+            todo.append(expr[1])
+            todo.extend(expr[2])
+        elif typ == "function":
+            todo.extend(expr[1])
+            todo.extend(expr[2])
+        elif typ == "assignment":
+            todo.append(expr[1])
+            todo.append(expr[2])
+        elif typ == "operation":
+            todo.append(expr[2])
+            todo.append(expr[3])
+    return ret
+
+
+_stages = (
+    ("lex", lambda source: list(lex(source))),
+    ("parse", lambda tokens: list(parse(tokens))),
+    ("compile", lambda exprs: compile_list(exprs, Env())),
+)
+
+
+def _best_time(fn, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ret = fn(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, ret
+
+
+def _peak_memory(fn, arg):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(source, repeat):
+    """
+    Run each stage on source, returning a dict of results for each.
+    """
+    results = {}
+    arg = source
+    counts = {}
+    for name, fn in _stages:
+        try:
+            # Memory first, before the timed runs fill Python's free lists
+            peak = _peak_memory(fn, arg)
+            seconds, ret = _best_time(fn, arg, repeat)
+        except RecursionError as e:
+            results[name] = {"failed": str(e)}
+            break
+        if name == "lex":
+            counts["tokens"] = len(ret)
+        elif name == "parse":
+            counts["nodes"] = count_nodes(ret)
+        unit = "tokens" if name == "lex" else "nodes"
+        results[name] = {
+            "seconds": seconds,
+            unit: counts[unit],
+            unit + "_per_second": counts[unit] / seconds,
+            "peak_bytes": peak,
+        }
+        arg = ret
+    return results
+
+
+def _write_stage(out, corpus, name, result):
+    if "failed" in result:
+        out.write("%-15s %-8s failed: %s\n" % (corpus, name, result["failed"]))
+        return
+    unit = "tokens" if name == "lex" else "nodes"
+    out.write(
+        "%-15s %-8s %9.2fms %12.0f %s/s %10.1fKiB\n" % (
+            corpus,
+            name,
+            result["seconds"] * 1000,
+            result[unit + "_per_second"],
+            unit,
+            result["peak_bytes"] / 1024,
+        )
+    )
+
+
+def main(argv, stdout):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bench.frontend",
+        description="Time lexing, parsing and compiling generated programs."
+    )
+    parser.add_argument(
+        "shapes",
+        nargs="*",
+        help="The shapes of program to measure (default: all of them)."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "-o", "--output", help="Write the results to this file, as JSON.")
+    args = parser.parse_args(argv[1:])
+    for shape in args.shapes:
+        if shape not in shape_names():
+            parser.error(
+                "Unknown shape '%s'.  Choose from: %s." % (
+                    shape, ", ".join(shape_names()))
+            )
+
+    results = {}
+    for shape, size in corpora:
+        if len(args.shapes) > 0 and shape not in args.shapes:
+            continue
+        corpus = "%s-%d" % (shape, size)
+        source = generate(shape, size, args.seed)
+        results[corpus] = measure(source, args.repeat)
+        for name, result in results[corpus].items():
+            _write_stage(stdout, corpus, name, result)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv, sys.stdout))
@@ -0,0 +1,131 @@
+"""
+Generates Cell programs of a chosen shape and size, for benchmarking the
+parts of Cell that read and compile programs:
+
+    python3 -m bench.generate defs 1000 > defs.cell
+
+The shapes are:
+
+    - deep:    one expression nested size levels deep, alternating calls
+               of functions defined in place and operations,
+    - chains:  ten assignments, each of a chain of size operations,
+    - defs:    size top-level function definitions, which call the ones
+               before them,
+    - strings: size assignments of string literals of about 1000
+               characters each.
+
+The same shape, size and seed always give the same program.  Every program
+is valid Cell.  deep and chains programs nest size levels deep, so large
+ones only run on the vm engine, and don't compile to JavaScript, since the
+other engines and compile_.py recurse once per level; the others run on
+every engine.
+"""
+
+import argparse
+import random
+import sys
+
+
+# Not "/": operators group to the right, so the right side of a division
+# is the rest of the chain, which could come to 0.
+_operators = "+-*"
+
+_words = (
+    "cell", "pair", "first", "second", "list", "lambda", "symbol", "value",
+    "print", "equals", "function", "closure", "environment", "token",
+)
+
+
+def _number(rng):
+    return str(rng.randint(1, 99))
+
+
+def _deep(rng, size):
+    # Built from the inside out, since the program is written out flat
+    expr = _number(rng)
+    for i in range(size):
+        if i % 2 == 0:
+            expr = "{%s;}()" % expr
+        else:
+            expr = "%s %s %s" % (_number(rng), rng.choice(_operators), expr)
+    return "deep = %s;\n" % expr
+
+
+def _chains(rng, size):
+    ret = []
+    for i in range(10):
+        terms = [_number(rng)]
+        for _ in range(size):
+            terms.append(rng.choice(_operators))
+            if i > 0 and rng.random() < 0.2:
+                terms.append("chain%d" % rng.randrange(i))
+            else:
+                terms.append(_number(rng))
+        ret.append("chain%d = %s;\n" % (i, " ".join(terms)))
+    return "".join(ret)
+
+
+def _defs(rng, size):
+    ret = []
+    for i in range(size):
+        if i == 0:
+            body = "a %s b" % rng.choice(_operators)
+        else:
+            body = "fn%d(b, a) %s %s" % (
+                rng.randrange(i), rng.choice(_operators), _number(rng))
+        ret.append("fn%d = {:(a, b) %s;};\n" % (i, body))
+    return "".join(ret)
+
+
+def _strings(rng, size):
+    ret = []
+    for i in range(size):
+        words = []
+        length = 0
+        while length < 1000:
+            word = rng.choice(_words)
+            words.append(word)
+            length += len(word) + 1
+        ret.append('s%d = "%s";\n' % (i, " ".join(words)))
+    return "".join(ret)
+
+
+_shapes = {
+    "deep": _deep,
+    "chains": _chains,
+    "defs": _defs,
+    "strings": _strings,
+}
+
+
+def shape_names():
+    return sorted(_shapes.keys())
+
+
+def generate(shape, size, seed=0):
+    """
+    The source code of a Cell program of the given shape and size.
+    """
+    if shape not in _shapes:
+        raise Exception(
+            "Unknown shape '%s'.  Choose from: %s." % (
+                shape, ", ".join(shape_names()))
+        )
+    return _shapes[shape](random.Random(seed), size)
+
+
+def main(argv, stdout):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bench.generate",
+        description="Write a generated Cell program to stdout."
+    )
+    parser.add_argument("shape", choices=shape_names())
+    parser.add_argument("size", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv[1:])
+    stdout.write(generate(args.shape, args.size, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv, sys.stdout))
@@ -0,0 +1,188 @@
+"""
+Runs the benchmark workloads in this directory and reports how long each
+one takes:
+
+    python3 -m bench.run                        # Print the times
+    python3 -m bench.run -o new.json            # ... and save them
+    python3 -m bench.run --baseline old.json    # ... and compare them
+
+Each workload is a Cell program (bench/<name>.cell).  It is run --warmup
+times without timing it, then --repeat times, timing the whole of
+pycell.run.run each time, in this process and with its output thrown
+away.
+
+To check a change for regressions, save a baseline before making it, then
+compare against that baseline afterwards.  A workload has regressed if its
+median time is more than --threshold slower than the baseline's, and then
+this exits with status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from io import StringIO
+
+from pycell.engines import engine_names
+from pycell.run import run
+
+
+_bench_dir = os.path.dirname(os.path.abspath(__file__))
+
+_incell = os.path.join(_bench_dir, "..", "incell", "cell.cell")
+
+
+def workload_names():
+    return sorted(
+        f[:-len(".cell")]
+        for f in os.listdir(_bench_dir)
+        if f.endswith(".cell")
+    )
+
+
+def workload_source(name):
+    with open(os.path.join(_bench_dir, name + ".cell")) as f:
+        source = f.read()
+    if name == "incell_lexer":
+        # The lexer is the part of incell/cell.cell before its tests
+        with open(_incell) as f:
+            incell = f.read()
+        source = incell[:incell.index('"--- Test Utils ---";')] + source
+    return source
+
+
+def time_workload(filename, engine, warmup, repeat):
+    times = []
+    for i in range(warmup + repeat):
+        with StringIO() as stdin, StringIO() as stdout:
+            start = time.perf_counter()
+            run(filename, stdin, stdout, stdout, engine, cache=False)
+            elapsed = time.perf_counter() - start
+        if i >= warmup:
+            times.append(elapsed)
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+    }
+
+
+def run_benchmarks(names, engine, warmup, repeat, out):
+    results = {
+        "engine": engine,
+        "python": platform.python_version(),
+        "warmup": warmup,
+        "repeat": repeat,
+        "workloads": {},
+    }
+    d = tempfile.mkdtemp()
+    try:
+        for name in names:
+            filename = os.path.join(d, name + ".cell")
+            with open(filename, "w") as f:
+                f.write(workload_source(name))
+            result = time_workload(filename, engine, warmup, repeat)
+            results["workloads"][name] = result
+            out.write(
+                "%-14s median %8.2fms  min %8.2fms\n" % (
+                    name, result["median"] * 1000, result["min"] * 1000)
+            )
+    finally:
+        shutil.rmtree(d)
+    return results
+
+
+def compare(baseline, results, threshold, out):
+    """
+    Write how each workload's median time changed since baseline, and
+    return the names of those that got more than threshold slower.
+    """
+    regressions = []
+    if baseline["engine"] != results["engine"]:
+        out.write(
+            "(The baseline used the %s engine, not %s.)\n" % (
+                baseline["engine"], results["engine"])
+        )
+    for name, result in sorted(results["workloads"].items()):
+        old = baseline["workloads"].get(name)
+        if old is None:
+            out.write("%-14s (not in baseline)\n" % name)
+            continue
+        change = result["median"] / old["median"] - 1
+        if change > threshold:
+            verdict = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            verdict = "faster"
+        else:
+            verdict = ""
+        line = "%-14s %8.2fms -> %8.2fms  %+6.1f%%  %s" % (
+            name,
+            old["median"] * 1000,
+            result["median"] * 1000,
+            change * 100,
+            verdict,
+        )
+        out.write(line.rstrip() + "\n")
+    return regressions
+
+
+def main(argv, stdout):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bench.run",
+        description="Time the Cell benchmark workloads."
+    )
+    parser.add_argument(
+        "workloads",
+        nargs="*",
+        help="The workloads to run (default: all of them)."
+    )
+    parser.add_argument("--engine", default="tree", choices=engine_names())
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "-o", "--output", help="Write the results to this file, as JSON.")
+    parser.add_argument(
+        "--baseline",
+        help="Compare the results with these, saved earlier with -o."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="How much slower counts as a regression (default: 0.1 = 10%%)."
+    )
+    args = parser.parse_args(argv[1:])
+
+    names = workload_names()
+    for name in args.workloads:
+        if name not in names:
+            parser.error(
+                "Unknown workload '%s'.  Choose from: %s." % (
+                    name, ", ".join(names))
+            )
+    if len(args.workloads) > 0:
+        names = args.workloads
+
+    results = run_benchmarks(
+        names, args.engine, args.warmup, args.repeat, stdout)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        stdout.write("\nCompared with %s:\n" % args.baseline)
+        if len(compare(baseline, results, args.threshold, stdout)) > 0:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv, sys.stdout))
@@ -0,0 +1,96 @@
+"""
+Keeps the parsed form of each program file on disk, in a __cellcache__
+directory next to it (like Python's __pycache__), so that running the same
+file again skips lexing and parsing.
+
+A cache file holds the format version, a hash of the source, and the
+expressions parse() made from it, written with marshal.  It is only used if
+both the version and the hash still match.
+"""
+
+import hashlib
+import marshal
+import os
+
+from pycell.chars_in_file import chunks_in_file
+from pycell.lexer import lex, lex_chunks
+from pycell.parser import parse
+
+
+# Change this whenever the parser's output changes
+_format_version = 1
+
+_cache_dir = "__cellcache__"
+
+
+def cache_path(filename):
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, _cache_dir, name + ".ast")
+
+
+def _load(path, digest):
+    try:
+        with open(path, "rb") as f:
+            version, cached_digest, exprs = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != _format_version or cached_digest != digest:
+        return None
+    return exprs
+
+
+def _save(path, digest, exprs, mode):
+    """
+    Write the cache file atomically: write a temporary file, then rename it
+    into place, so a concurrent run sees either the old file or the new one.
+    Failing to write it (e.g. in a read-only directory) is not an error.
+    """
+    try:
+        data = marshal.dumps((_format_version, digest, exprs))
+    except ValueError:
+        return  # Nested too deeply for marshal
+    import tempfile  # Only needed here, and slow to import
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+def _parse_streaming(filename):
+    with open(filename, encoding="ascii") as f:
+        yield from parse(lex_chunks(chunks_in_file(f)))
+
+
+def parse_file(filename, cache=True):
+    """
+    The expressions in a program file.  With the cache, they are a list,
+    read from the cache if it is up to date, and otherwise made by parsing
+    the whole file (and updating the cache).  Without it, they are an
+    iterator that parses the file as it goes, so a program with a syntax
+    error runs up to the error.
+    """
+    if not cache:
+        return _parse_streaming(filename)
+
+    with open(filename, "rb") as f:
+        data = f.read()
+        mode = os.fstat(f.fileno()).st_mode & 0o666
+    # Translate newlines as reading in text mode would
+    source = data.decode("ascii").replace("\r\n", "\n").replace("\r", "\n")
+    digest = hashlib.sha256(data).digest()
+    path = cache_path(filename)
+    exprs = _load(path, digest)
+    if exprs is None:
+        exprs = list(parse(lex(source)))
+        _save(path, digest, exprs, mode)
+    return exprs
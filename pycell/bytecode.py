@@ -0,0 +1,277 @@
+"""
+Compiles resolved Cell expressions (see resolver.py) into bytecode for the
+virtual machine in vm.py.
+
+Each piece of code is a flat array of (opcode, argument) pairs, plus a pool
+of constants that the arguments index into.  The code for a function body
+also holds the Scope of the Frame it runs in, so symbols inside functions
+are loaded by position in a Frame, as the resolver worked out.
+
+A call to if, by name, with both branches written out as functions taking
+no arguments, is compiled to jumps: if if still means the native when it
+runs, the chosen branch runs in the current frame.  Otherwise it is an
+ordinary call.
+"""
+
+from array import array
+
+from pycell.resolver import is_if_form
+
+
+CONST = 0            # Push consts[arg]
+LOAD_NAME = 1        # Push the symbol named consts[arg], found by name
+LOAD_TOP = 2         # ... found first in the top-level Env we are running in
+LOAD_GLOBAL = 3      # ... found first in the top-level Env of this Frame
+LOAD_LOCAL = 4       # Push slot arg of this Frame
+LOAD_OUTER = 5       # Push a slot of an enclosing Frame: (depth, slot) consts[arg]
+UNKNOWN = 6          # Fail on the symbol named consts[arg], which can't be found
+CHECK_NEW = 7        # Fail if the name consts[arg] is already assigned here
+STORE = 8            # Assign the top of the stack to the name consts[arg]
+CHECK_NEW_LOCAL = 9  # Fail if slot arg of this Frame is already assigned
+STORE_LOCAL = 10     # Assign the top of the stack to slot arg of this Frame
+POP = 11             # Discard the top of the stack
+ADD = 12
+SUBTRACT = 13
+MULTIPLY = 14
+DIVIDE = 15
+BAD_OPERATION = 16   # Discard two values and fail on operator consts[arg]
+MAKE_FUNCTION = 17   # Push a function made from (params, body, code) consts[arg]
+CALL = 18            # Call using (fn_expr, number of args) consts[arg]
+RETURN = 19          # Return the top of the stack to the calling frame
+IF_NATIVE = 20       # Unless the value under the top is the native if, jump
+                     # to arg.  If it is, remove it.
+JUMP_IF_FALSE = 21   # Pop a number, and jump to arg if it is 0
+JUMP = 22            # Jump to arg
+
+_LABEL = -1          # Not emitted: the jumps in arg go to here
+
+_operations = {"+": ADD, "-": SUBTRACT, "*": MULTIPLY, "/": DIVIDE}
+
+_jumps = (IF_NATIVE, JUMP_IF_FALSE, JUMP)
+
+
+class Code:
+    def __init__(self, ops, consts, scope=None):
+        self.ops = ops
+        self.consts = consts
+        self.scope = scope
+
+
+class _Compiler:
+    def __init__(self, scope=None):
+        self.ops = array("i")
+        self.consts = []
+        self.scope = scope
+        self._const_indices = {}
+
+    def emit(self, op, arg=0):
+        if op == _LABEL:
+            # arg holds the positions of the jumps' arguments
+            for i in arg:
+                self.ops[i] = len(self.ops)
+            return
+        if op in _jumps:
+            arg.append(len(self.ops) + 1)
+            arg = 0
+        self.ops.append(op)
+        self.ops.append(arg)
+
+    def const(self, value):
+        """
+        Find or add value in the constant pool.  Values are shared only if
+        they are the same object, or equal strings or value tuples.
+        """
+        try:
+            key = (type(value), value)
+            hash(key)
+        except TypeError:
+            key = id(value)
+        index = self._const_indices.get(key)
+        if index is None:
+            index = len(self.consts)
+            self.consts.append(value)
+            self._const_indices[key] = index
+        return index
+
+    def expr(self, expr):
+        _compile([(self, expr, ())])
+
+    def sequence(self, exprs):
+        todo = []
+        self.push_sequence(exprs, (), todo)
+        _compile(todo)
+
+    def push_sequence(self, exprs, elided, todo):
+        """
+        Push onto todo what compiles exprs here, leaving the value of the
+        last one.  todo is a stack, so the first thing to do goes on last.
+        """
+        if len(exprs) == 0:
+            todo.append((self, CONST, self.const(("none",))))
+        for i in reversed(range(len(exprs))):
+            todo.append((self, exprs[i], elided))
+            if i > 0:
+                todo.append((self, POP, 0))
+
+    def code(self):
+        self.emit(RETURN)
+        return Code(self.ops, self.consts, self.scope)
+
+
+def _runtime_depth(depth, elided):
+    """
+    How many Frames up a symbol the resolver found depth scopes up really
+    is.  elided holds the depths of the scopes that have no Frame, because
+    they belong to if branches compiled into the code around them.
+    """
+    if depth is None:
+        return None
+    return depth - sum(1 for e in elided if e < depth)
+
+
+def _symbol(compiler, expr, elided):
+    _, name, depth, slot = expr
+    depth = _runtime_depth(depth, elided)
+    if depth is None:
+        compiler.emit(LOAD_NAME, compiler.const(name))
+    elif slot is None and depth == 0:
+        compiler.emit(LOAD_TOP, compiler.const(name))
+    elif slot is None:
+        compiler.emit(LOAD_GLOBAL, compiler.const(name))
+    elif depth == 0:
+        compiler.emit(LOAD_LOCAL, slot)
+    else:
+        compiler.emit(LOAD_OUTER, compiler.const((depth, slot)))
+
+
+def _push_if_form(compiler, expr, elided, todo):
+    """
+    Push onto todo what compiles the if special form expr.  A branch with
+    no locals of its own runs in the current frame; one with locals is
+    called, to give it a Frame.  If if turns out not to be the native, the
+    branches are made into functions whose bodies are compiled only if
+    they are called, so nested ifs are not compiled twice over.
+    """
+    fn_expr, args = expr[1], expr[2]
+    else_label = []
+    fallback_label = []
+    end_label = []
+    todo.append((compiler, _LABEL, end_label))
+    todo.append(
+        (compiler, CALL, compiler.const((expr[3], len(args)))))
+    for branch in reversed(args[1:]):
+        todo.append(
+            (
+                compiler,
+                MAKE_FUNCTION,
+                compiler.const((branch[1], branch[4], None))
+            )
+        )
+    todo.append((compiler, _LABEL, fallback_label))
+    for i, branch in reversed(list(enumerate(args[1:]))):
+        todo.append((compiler, JUMP, end_label))
+        if len(branch[3].names) == 0:
+            branch_elided = (0,) + tuple(e + 1 for e in elided)
+            compiler.push_sequence(branch[2], branch_elided, todo)
+        else:
+            todo.append(
+                (compiler, CALL, compiler.const((branch[:2] + branch[4:], 0))))
+            todo.append((compiler, branch, elided))
+        if i == 1:
+            todo.append((compiler, _LABEL, else_label))
+    todo.append((compiler, JUMP_IF_FALSE, else_label))
+    todo.append((compiler, IF_NATIVE, fallback_label))
+    todo.append((compiler, args[0], elided))
+    todo.append((compiler, fn_expr, elided))
+
+
+def _compile(todo):
+    """
+    Work through todo, a stack of (compiler, expr, elided) triples to
+    compile, and of (compiler, op, arg) instructions to emit once what is
+    above them is done.  Function bodies go on the same stack, each with a
+    compiler of its own, so however deeply expressions and functions nest
+    this uses no more of the Python stack.
+    """
+    while len(todo) > 0:
+        item = todo.pop()
+        compiler = item[0]
+        if type(item[1]) is int:
+            compiler.emit(item[1], item[2])
+            continue
+        expr = item[1]
+        elided = item[2]
+        typ = expr[0]
+        if typ == "constant":
+            compiler.emit(CONST, compiler.const(expr[1]))
+        elif typ == "number":
+            compiler.emit(CONST, compiler.const(("number", float(expr[1]))))
+        elif typ == "string":
+            compiler.emit(CONST, compiler.const(("string", expr[1])))
+        elif typ == "none":
+            compiler.emit(CONST, compiler.const(("none",)))
+        elif typ == "operation":
+            op = _operations.get(expr[1])
+            if op is None:
+                todo.append((compiler, BAD_OPERATION, compiler.const(expr[1])))
+            else:
+                todo.append((compiler, op, 0))
+            todo.append((compiler, expr[3], elided))
+            todo.append((compiler, expr[2], elided))
+        elif typ == "symbol":
+            _symbol(compiler, expr, elided)
+        elif typ == "unknown":
+            compiler.emit(UNKNOWN, compiler.const(expr[1]))
+        elif typ == "assignment":
+            slot = expr[1][3]
+            if slot is None:
+                name = compiler.const(expr[1][1])
+                compiler.emit(CHECK_NEW, name)
+                todo.append((compiler, STORE, name))
+            else:
+                compiler.emit(CHECK_NEW_LOCAL, slot)
+                todo.append((compiler, STORE_LOCAL, slot))
+            todo.append((compiler, expr[2], elided))
+        elif typ == "call":
+            if is_if_form(expr):
+                _push_if_form(compiler, expr, elided, todo)
+                continue
+            todo.append(
+                (compiler, CALL, compiler.const((expr[3], len(expr[2])))))
+            for arg in reversed(expr[2]):
+                todo.append((compiler, arg, elided))
+            todo.append((compiler, expr[1], elided))
+        elif typ == "function":
+            # The Code shares the body compiler's ops and consts, so it is
+            # complete once the body has been compiled below.
+            body = _Compiler(expr[3])
+            compiler.emit(
+                MAKE_FUNCTION,
+                compiler.const(
+                    (expr[1], expr[4], Code(body.ops, body.consts, expr[3])))
+            )
+            todo.append((body, RETURN, 0))
+            body.push_sequence(expr[2], tuple(e + 1 for e in elided), todo)
+        else:
+            raise Exception("Unknown expression type: " + str(expr))
+
+
+def compile_function(expr):
+    """
+    Compile the body of a resolved function expression into Code that
+    returns the value of its last expression (or None, if there are none),
+    running in a Frame for the function's Scope.
+    """
+    compiler = _Compiler(expr[3])
+    compiler.sequence(expr[2])
+    return compiler.code()
+
+
+def compile_expr(expr):
+    """
+    Compile a resolved top-level expression into Code that returns its
+    value, running in the top-level Env.
+    """
+    compiler = _Compiler()
+    compiler.expr(expr)
+    return compiler.code()
@@ -2,12 +2,28 @@ from pycell.assert_implements import assert_implements
 from pycell.readable import Readable
 
 
+_chunk_size = 64 * 1024
+
+
 def chars_in_file(f):
     """
     Provides an iterator through all the characters in a file, individually.
+    Use this when characters arrive slowly, e.g. typed into the REPL.
     """
     assert_implements(f, Readable)
     ch = f.read(1)
     while ch != "":
         yield ch
         ch = f.read(1)
+
+
+def chunks_in_file(f, chunk_size=_chunk_size):
+    """
+    Provides an iterator through the contents of a file in large pieces,
+    for lexing with lexer.lex_chunks.
+    """
+    assert_implements(f, Readable)
+    chunk = f.read(chunk_size)
+    while chunk != "":
+        yield chunk
+        chunk = f.read(chunk_size)
@@ -0,0 +1,391 @@
+"""
+An evaluation engine that turns each parsed expression into a tree of Python
+closures once, and then runs those closures.
+
+Before compiling, the resolver works out where each symbol lives, so that
+inside functions symbols are found by position in a Frame, instead of by
+name in a chain of Envs.  Top-level code still runs in the Env it is given.
+
+Values are the same as in eval_.py, so natives and the rest of the library
+work unchanged.  Function values made here carry, as a fifth element, a
+function that takes the captured environment and the arguments and runs
+the compiled body.
+
+Calls in tail position (the last expression in a function body, or in a
+branch of an if in tail position) are not made where they are written:
+they hand back a _TailCall, and _call_value makes it by going round its
+loop again, so they run in constant Python stack, as in eval_.py.
+"""
+
+from pycell.eval_ import (
+    eval_expr,
+    fail_if_wrong_number_of_args,
+    fail_if_wrong_number_of_native_args,
+    native_arity,
+)
+from pycell.frame import Frame
+from pycell.prologue.native.if_ import if_
+from pycell.resolver import is_if_form, resolve, resolve_function
+
+
+_none = ("none",)
+
+
+class _TailCall:
+    """
+    A call that the closure in tail position has left for _call_value to
+    make.
+    """
+    __slots__ = ("fn_expr", "fn", "args", "env")
+
+    def __init__(self, fn_expr, fn, args, env):
+        self.fn_expr = fn_expr
+        self.fn = fn
+        self.args = args
+        self.env = env
+
+
+def _finish(ret):
+    """
+    The value of ret, making the call it stands for if it is a _TailCall.
+    """
+    if type(ret) is _TailCall:
+        return _call_value(ret.fn_expr, ret.fn, ret.args, ret.env)
+    return ret
+
+
+def _constant(value):
+    def run(env):
+        return value
+    return run
+
+
+def _operation(expr):
+    arg1 = closure_of(expr[2])
+    arg2 = closure_of(expr[3])
+    op = expr[1]
+    if op == "+":
+        def run(env):
+            return ("number", arg1(env)[1] + arg2(env)[1])
+    elif op == "-":
+        def run(env):
+            return ("number", arg1(env)[1] - arg2(env)[1])
+    elif op == "*":
+        def run(env):
+            return ("number", arg1(env)[1] * arg2(env)[1])
+    elif op == "/":
+        def run(env):
+            return ("number", arg1(env)[1] / arg2(env)[1])
+    else:
+        def run(env):
+            arg1(env)
+            arg2(env)
+            raise Exception("Unknown operation: " + op)
+    return run
+
+
+def _by_name(env, name):
+    ret = env.get(name)
+    if ret is None:
+        raise Exception("Unknown symbol '%s'." % name)
+    return ret
+
+
+def _symbol(expr):
+    _, name, depth, slot = expr
+    if depth is None:
+        def run(env):
+            return _by_name(env, name)
+    elif slot is None and depth == 0:
+        def run(env):
+            ret = env.items.get(name)
+            if ret is None:
+                return _by_name(env, name)
+            return ret
+    elif slot is None:
+        def run(env):
+            ret = env.root.items.get(name)
+            if ret is None:
+                return _by_name(env, name)
+            return ret
+    elif depth == 0:
+        def run(env):
+            ret = env.slots[slot]
+            if ret is None:
+                # Not assigned yet here, so it means the one outside
+                return _by_name(env.parent, name)
+            return ret
+    elif depth == 1:
+        def run(env):
+            frame = env.parent
+            ret = frame.slots[slot]
+            if ret is None:
+                return _by_name(frame.parent, name)
+            return ret
+    else:
+        def run(env):
+            frame = env
+            for _ in range(depth):
+                frame = frame.parent
+            ret = frame.slots[slot]
+            if ret is None:
+                return _by_name(frame.parent, name)
+            return ret
+    return run
+
+
+def _unknown(expr):
+    name = expr[1]
+
+    def run(env):
+        raise Exception("Unknown symbol '%s'." % name)
+    return run
+
+
+def _assignment(expr):
+    _, var_name, _, slot = expr[1]
+    value = closure_of(expr[2])
+    if slot is None:
+        def run(env):
+            if var_name in env.items:
+                raise Exception(
+                    "Not allowed to re-assign symbol '%s'." % var_name)
+            val = value(env)
+            env.items[var_name] = val
+            return val
+    else:
+        def run(env):
+            if env.slots[slot] is not None:
+                raise Exception(
+                    "Not allowed to re-assign symbol '%s'." % var_name)
+            val = value(env)
+            env.slots[slot] = val
+            return val
+    return run
+
+
+def _call(expr, tail):
+    fn_expr = expr[3]
+    fn_closure = closure_of(expr[1])
+    arg_closures = [closure_of(a) for a in expr[2]]
+
+    if tail:
+        def run(env):
+            fn = fn_closure(env)
+            args = [a(env) for a in arg_closures]
+            if fn[0] == "native" and fn[1] is not if_:
+                # Natives don't come back into Cell, so make them now
+                return _call_value(fn_expr, fn, args, env)
+            return _TailCall(fn_expr, fn, args, env)
+    else:
+        def run(env):
+            fn = fn_closure(env)
+            args = [a(env) for a in arg_closures]
+            return _call_value(fn_expr, fn, args, env)
+
+    if is_if_form(expr):
+        return _if_form(expr, run, tail)
+    return run
+
+
+def _if_form(expr, call, tail):
+    """
+    A call to if, by name, with both branches written out as functions
+    taking no arguments.  If if still means the native, the chosen branch
+    body is run directly, without making function values for the branches.
+    Otherwise, it is an ordinary call.
+
+    The branch bodies end in tail position, so if the if is not in tail
+    position itself, any call they leave is made here.
+    """
+    fn_closure = closure_of(expr[1])
+    condition = closure_of(expr[2][0])
+    then_enter = _enter(expr[2][1][3], expr[2][1][2])
+    else_enter = _enter(expr[2][2][3], expr[2][2][2])
+    no_args = []
+
+    def run(env):
+        fn = fn_closure(env)
+        if fn[0] != "native" or fn[1] is not if_:
+            return call(env)
+        t = condition(env)
+        if t[0] != "number":
+            raise Exception(
+                (
+                    "Only numbers may be passed to an if, but I was passed '%s'"
+                ) % str(t)
+            )
+        if t[1] != 0:
+            return then_enter(env, no_args)
+        else:
+            return else_enter(env, no_args)
+
+    if tail:
+        return run
+
+    def run_and_finish(env):
+        return _finish(run(env))
+    return run_and_finish
+
+
+def _enter(scope, body):
+    """
+    Make a function that runs body in a new Frame for scope, given the
+    captured environment and the arguments.  It may return a _TailCall.
+    """
+    code = _sequence(body, tail=True)
+
+    def enter(parent, args):
+        frame = Frame(scope, parent)
+        frame.slots[:len(args)] = args
+        return code(frame)
+    return enter
+
+
+def _function(expr):
+    params = expr[1]
+    enter = _enter(expr[3], expr[2])
+    body = expr[4]
+
+    def run(env):
+        return ("function", params, body, env, enter)
+    return run
+
+
+def _sequence(exprs, tail=False):
+    closures = [closure_of(e) for e in exprs[:-1]]
+    closures.extend(closure_of(e, tail) for e in exprs[-1:])
+    if len(closures) == 0:
+        return _constant(_none)
+    elif len(closures) == 1:
+        return closures[0]
+    else:
+        init = closures[:-1]
+        last = closures[-1]
+
+        def run(env):
+            for c in init:
+                c(env)
+            return last(env)
+        return run
+
+
+_enters = {}
+
+
+def _enter_of(fn):
+    """
+    The compiled body of a function value.  Values made by this engine carry
+    it with them, but others (e.g. made by natives, or loaded from an image)
+    are resolved and compiled on first use.
+    """
+    if len(fn) > 4 and fn[4] is not None:
+        return fn[4]
+    body = fn[2]
+    cached = _enters.get(id(body))
+    if cached is None or cached[0] is not body:
+        resolved = resolve_function(fn[1], body)
+        cached = (body, _enter(resolved[3], resolved[2]))
+        _enters[id(body)] = cached
+    return cached[1]
+
+
+def _if(fn_expr, env, t, then_fn, else_fn):
+    """
+    Behaves like the native if_, but hands the chosen branch back to
+    _call_value instead of to eval_.py.  The branch runs in the environment
+    it was defined in, which for a {...} written inside the if is the same
+    as the one the if was called in.
+    """
+    if t[0] != "number":
+        raise Exception(
+            (
+                "Only numbers may be passed to an if, but I was passed '%s'"
+            ) % str(t)
+        )
+    to_call = then_fn if t[1] != 0 else else_fn
+    if to_call[0] == "function":
+        return _TailCall(to_call[:4], to_call, [], env)
+    else:
+        return eval_expr(("call", ("constant", to_call), []), env)
+
+
+def _call_value(fn_expr, fn, args, env):
+    """
+    Call fn with args, then any calls it leaves in tail position, until
+    one gives a value.
+    """
+    while True:
+        typ = fn[0]
+        if typ == "function":
+            fail_if_wrong_number_of_args(fn_expr, fn[1], args)
+            ret = _enter_of(fn)(fn[3], args)
+        elif typ == "native":
+            py_fn = fn[1]
+            arity = fn[2] if len(fn) > 2 else native_arity(fn)
+            fail_if_wrong_number_of_native_args(fn_expr, arity, args)
+            if py_fn is not if_:
+                return py_fn(env, *args)
+            ret = _if(fn_expr, env, *args)
+        else:
+            raise Exception(
+                "Attempted to call something that is not a function: %s" %
+                str(fn)
+            )
+        if type(ret) is not _TailCall:
+            return ret
+        fn_expr = ret.fn_expr
+        fn = ret.fn
+        args = ret.args
+        env = ret.env
+
+
+def closure_of(expr, tail=False):
+    """
+    Compile a resolved expression into a Python function taking an Env (at
+    the top level) or a Frame (inside a function).  If tail is true, the
+    expression is in tail position, and a call there may return a _TailCall
+    instead of making the call.
+    """
+    typ = expr[0]
+    if typ == "constant":
+        return _constant(expr[1])
+    elif typ == "number":
+        return _constant(("number", float(expr[1])))
+    elif typ == "string":
+        return _constant(("string", expr[1]))
+    elif typ == "none":
+        return _constant(_none)
+    elif typ == "operation":
+        return _operation(expr)
+    elif typ == "symbol":
+        return _symbol(expr)
+    elif typ == "unknown":
+        return _unknown(expr)
+    elif typ == "assignment":
+        return _assignment(expr)
+    elif typ == "call":
+        return _call(expr, tail)
+    elif typ == "function":
+        return _function(expr)
+    else:
+        raise Exception("Unknown expression type: " + str(expr))
+
+
+def eval_iter(exprs, env):
+    """
+    Evaluate each expression as it arrives, so symbols defined by later
+    expressions are looked up by name.
+    """
+    for expr in exprs:
+        yield closure_of(resolve([expr], env, closed=False)[0])(env)
+
+
+def eval_list(exprs, env):
+    """
+    Evaluate a whole program, resolving it all first.
+    """
+    ret = _none
+    for expr in resolve(list(exprs), env):
+        ret = closure_of(expr)(env)
+    return ret
@@ -1,9 +1,8 @@
-import pycell.library
+import pycell.prologue.prologue_ast
 
-from pycell.chars_in_file import chars_in_file
+from pycell.ast_cache import parse_file
 from pycell.env import Env
-from pycell.lexer import lex
-from pycell.parser import parse
+from pycell.optimise import optimise as optimise_exprs
 
 
 def compile_operation(expr, env, indent):
@@ -24,6 +23,18 @@ def native_equals(args, env, indent):
         return "(%s===%s ? 1 : 0)" % tuple(compile_expr(e, env, indent) for e in args)
 
 
+def compile_branch(expr, env, indent):
+    """
+    A branch written out as a function taking no arguments is compiled
+    inline.  Anything else is called.
+    """
+    if expr[0] == "function" and len(expr[1]) == 0:
+        return compile_list(expr[2], env, indent, True)
+    else:
+        return "%sreturn (%s)();\n" % (
+            " " * indent, compile_expr(expr, env, indent))
+
+
 def native_if(args, env, indent):
     if len(args) != 3:
         raise Exception(
@@ -40,9 +51,9 @@ def native_if(args, env, indent):
 %s})()""" % (
             ind,
             compile_expr(args[0], env, indent),
-            compile_list(args[1][2], env, indent + 8, True),
+            compile_branch(args[1], env, indent + 8),
             ind,
-            compile_list(args[2][2], env, indent + 8, True),
+            compile_branch(args[2], env, indent + 8),
             ind,
             ind
         )
@@ -126,12 +137,33 @@ def mangle_symbol(sym):
     else:
         return sym
 
+def compile_string(value):
+    return "'%s'" % value.replace("'","\\'")
+
+
+def compile_constant(value):
+    typ = value[0]
+    if typ == "number":
+        ret = str(value[1])
+        if ret.endswith(".0"):
+            ret = ret[:-2]
+        return ret
+    elif typ == "string":
+        return compile_string(value[1])
+    elif typ == "none":
+        return "null"
+    else:
+        raise Exception("Compiling unknown constant '%s'." % str(value))
+
+
 def compile_expr(expr, env, indent):
     typ = expr[0]
-    if typ == "number":
+    if typ == "constant":
+        return compile_constant(expr[1])
+    elif typ == "number":
         return expr[1]
     elif typ == "string":
-        return "'%s'" % expr[1].replace("'","\\'")
+        return compile_string(expr[1])
     elif typ == "symbol":
         return mangle_symbol(expr[1])
     elif typ == "function":
@@ -158,11 +190,335 @@ def compile_list(exprs, env, indent=0, return_last = False):
     return ret
 
 
-def compile_(output, filename):
+# JavaScript versions of the natives that are not compiled specially
+js_natives = """\
+function pair(f, s) {
+    return [f, s];
+}
+function first(p) {
+    if (p instanceof VectorSeq) {
+        return p.vector.nth(p.index);
+    } else if (p instanceof StringSeq) {
+        return p.string[p.index];
+    }
+    return p[0];
+}
+function second(p) {
+    if (p instanceof VectorSeq) {
+        return vseq_from(p.vector, p.index + 1);
+    } else if (p instanceof StringSeq) {
+        var i = p.index + 1;
+        return i < p.string.length ? new StringSeq(p.string, i) : null;
+    }
+    return p[1];
+}
+function list() {
+    var ret = null;
+    for (var i = arguments.length - 1; i >= 0; i--) {
+        ret = [arguments[i], ret];
+    }
+    return ret;
+}
+var list0 = list;
+var list1 = list;
+var list2 = list;
+var list3 = list;
+var list4 = list;
+var list5 = list;
+function Vector(count, shift, root, tail) {
+    this.count = count;
+    this.shift = shift;
+    this.root = root;
+    this.tail = tail;
+}
+Vector.prototype.tailOffset = function() {
+    return this.count < 32 ? 0 : ((this.count - 1) >>> 5) << 5;
+};
+Vector.prototype.nth = function(i) {
+    if (i >= this.tailOffset()) {
+        return this.tail[i & 31];
+    }
+    var node = this.root;
+    for (var level = this.shift; level > 0; level -= 5) {
+        node = node[(i >>> level) & 31];
+    }
+    return node[i & 31];
+};
+function vector_path(level, node) {
+    for (; level > 0; level -= 5) {
+        node = [node];
+    }
+    return node;
+}
+Vector.prototype.pushTail = function(level, parent, tail) {
+    var sub = ((this.count - 1) >>> level) & 31;
+    var ret = parent.slice();
+    if (level === 5) {
+        ret[sub] = tail;
+    } else if (sub < parent.length) {
+        ret[sub] = this.pushTail(level - 5, parent[sub], tail);
+    } else {
+        ret[sub] = vector_path(level - 5, tail);
+    }
+    return ret;
+};
+Vector.prototype.push = function(item) {
+    if (this.count - this.tailOffset() < 32) {
+        var tail = this.tail.slice();
+        tail.push(item);
+        return new Vector(this.count + 1, this.shift, this.root, tail);
+    }
+    var shift = this.shift;
+    var root;
+    if ((this.count >>> 5) > (1 << shift)) {
+        root = [this.root, vector_path(shift, this.tail)];
+        shift += 5;
+    } else {
+        root = this.pushTail(shift, this.root, this.tail);
+    }
+    return new Vector(this.count + 1, shift, root, [item]);
+};
+var empty_vector = new Vector(0, 5, [], []);
+function vec() {
+    var ret = empty_vector;
+    for (var i = 0; i < arguments.length; i++) {
+        ret = ret.push(arguments[i]);
+    }
+    return ret;
+}
+function push(v, item) {
+    return v.push(item);
+}
+function nth(v, i) {
+    return (i >= 0 && i < v.count) ? v.nth(i) : null;
+}
+function vlen(v) {
+    return v.count;
+}
+function vslice(v, start, end) {
+    start = Math.min(Math.max(start, 0), v.count);
+    end = Math.min(Math.max(end, start), v.count);
+    var ret = empty_vector;
+    for (var i = start; i < end; i++) {
+        ret = ret.push(v.nth(i));
+    }
+    return ret;
+}
+function VectorSeq(vector, index) {
+    this.vector = vector;
+    this.index = index;
+}
+function vseq_from(v, i) {
+    return i < v.count ? new VectorSeq(v, i) : null;
+}
+function vseq(v) {
+    return vseq_from(v, 0);
+}
+// Maps are hash array mapped tries, as in pycell/hash_map.py, so that
+// map_put copies only the nodes on the path to its key.
+function MapNode(bitmap, children) {
+    this.bitmap = bitmap;
+    this.children = children;  // Each a [key, value] array or a node
+}
+function MapCollision(entries) {
+    this.entries = entries;
+}
+function CellMap(count, root) {
+    this.count = count;
+    this.root = root;
+}
+function map_hash(key) {
+    var s = (typeof key === "number" ? "n" : "s") + key;
+    var h = 0;
+    for (var i = 0; i < s.length; i++) {
+        h = (Math.imul(h, 31) + s.charCodeAt(i)) | 0;
+    }
+    return h >>> 0;
+}
+function map_index(bitmap, bit) {
+    var x = bitmap & (bit - 1);
+    x = x - ((x >>> 1) & 0x55555555);
+    x = (x & 0x33333333) + ((x >>> 2) & 0x33333333);
+    return (((x + (x >>> 4)) & 0x0F0F0F0F) * 0x01010101) >>> 24;
+}
+function map_merge(shift, entry1, hash1, entry2, hash2) {
+    if (shift >= 32) {
+        return new MapCollision([entry1, entry2]);
+    }
+    var frag1 = (hash1 >>> shift) & 31;
+    var frag2 = (hash2 >>> shift) & 31;
+    if (frag1 === frag2) {
+        return new MapNode(
+            1 << frag1,
+            [map_merge(shift + 5, entry1, hash1, entry2, hash2)]
+        );
+    } else if (frag1 < frag2) {
+        return new MapNode((1 << frag1) | (1 << frag2), [entry1, entry2]);
+    } else {
+        return new MapNode((1 << frag1) | (1 << frag2), [entry2, entry1]);
+    }
+}
+// Returns the new node, and whether key was added (rather than replaced)
+function map_put_node(node, shift, h, key, value) {
+    var children;
+    if (node instanceof MapCollision) {
+        children = node.entries.slice();
+        for (var j = 0; j < children.length; j++) {
+            if (children[j][0] === key) {
+                children[j] = [key, value];
+                return [new MapCollision(children), false];
+            }
+        }
+        children.push([key, value]);
+        return [new MapCollision(children), true];
+    }
+    var bit = 1 << ((h >>> shift) & 31);
+    var i = map_index(node.bitmap, bit);
+    children = node.children.slice();
+    if (!(node.bitmap & bit)) {
+        children.splice(i, 0, [key, value]);
+        return [new MapNode(node.bitmap | bit, children), true];
+    }
+    var child = children[i];
+    var added = true;
+    if (Array.isArray(child)) {
+        if (child[0] === key) {
+            children[i] = [key, value];
+            added = false;
+        } else {
+            children[i] = map_merge(
+                shift + 5, child, map_hash(child[0]), [key, value], h);
+        }
+    } else {
+        var put = map_put_node(child, shift + 5, h, key, value);
+        children[i] = put[0];
+        added = put[1];
+    }
+    return [new MapNode(node.bitmap, children), added];
+}
+function map_entries(node, ret) {
+    var children = node instanceof MapCollision ? node.entries : node.children;
+    for (var i = 0; i < children.length; i++) {
+        if (Array.isArray(children[i])) {
+            ret.push(children[i]);
+        } else {
+            map_entries(children[i], ret);
+        }
+    }
+    return ret;
+}
+var empty_map = new CellMap(0, new MapNode(0, []));
+function map_new() {
+    return empty_map;
+}
+// The [key, value] entry for key, or null
+function map_find(m, key) {
+    var h = map_hash(key);
+    var node = m.root;
+    for (var shift = 0; ; shift += 5) {
+        if (node instanceof MapCollision) {
+            for (var j = 0; j < node.entries.length; j++) {
+                if (node.entries[j][0] === key) {
+                    return node.entries[j];
+                }
+            }
+            return null;
+        }
+        var bit = 1 << ((h >>> shift) & 31);
+        if (!(node.bitmap & bit)) {
+            return null;
+        }
+        var child = node.children[map_index(node.bitmap, bit)];
+        if (Array.isArray(child)) {
+            return child[0] === key ? child : null;
+        }
+        node = child;
+    }
+}
+function map_get(m, key) {
+    var entry = map_find(m, key);
+    return entry === null ? null : entry[1];
+}
+function map_put(m, key, value) {
+    var put = map_put_node(m.root, 0, map_hash(key), key, value);
+    return new CellMap(put[1] ? m.count + 1 : m.count, put[0]);
+}
+function map_has(m, key) {
+    return map_find(m, key) === null ? 0 : 1;
+}
+function map_len(m) {
+    return m.count;
+}
+function map_keys(m) {
+    return vseq(vec.apply(
+        null, map_entries(m.root, []).map(function(e) { return e[0]; })));
+}
+function sb_new() {
+    return "";
+}
+function sb_append(sb, s) {
+    return sb + s;
+}
+function sb_str(sb) {
+    return sb;
+}
+function concat(s1, s2) {
+    return s1 + s2;
+}
+function len(s) {
+    return s.length;
+}
+function char_at(i, s) {
+    return (i >= 0 && i < s.length) ? s[i] : null;
+}
+function StringSeq(string, index) {
+    this.string = string;
+    this.index = index;
+}
+function chars_in(s) {
+    return s.length > 0 ? new StringSeq(s, 0) : null;
+}
+function substring(s, start, end) {
+    start = Math.min(Math.max(start, 0), s.length);
+    end = Math.min(Math.max(end, start), s.length);
+    return s.substring(start, end);
+}
+function find(haystack, needle) {
+    var i = haystack.indexOf(needle);
+    return i === -1 ? null : i;
+}
+function split(s, sep) {
+    return list.apply(null, s.split(sep));
+}
+function join(lst, sep) {
+    var items = [];
+    for (; lst !== null; lst = second(lst)) {
+        items.push(first(lst));
+    }
+    return items.join(sep);
+}
+function starts_with(s, prefix) {
+    return s.startsWith(prefix) ? 1 : 0;
+}
+function to_number(s) {
+    if (typeof s === "number") {
+        return s;
+    }
+    return /^\\s*-?([0-9]+\\.?[0-9]*|\\.[0-9]+)\\s*$/.test(s) ? Number(s) : null;
+}
+function to_string(value) {
+    return value === null ? "None" : String(value);
+}
+"""
+
+
+def compile_(output, filename, optimise=True, cache=True):
     env = Env()
+    exprs = parse_file(filename, cache)
+    if optimise:
+        exprs = optimise_exprs(exprs)
     with open(output, "w") as outfile:
+        outfile.write(js_natives)
         outfile.write(
-            compile_list(parse(lex(pycell.library.as_text(env))), env))
-        with open(filename, encoding="ascii") as infile:
-            outfile.write(
-                compile_list(parse(lex(chars_in_file(infile))), env))
+            compile_list(pycell.prologue.prologue_ast.exprs, env))
+        outfile.write(compile_list(exprs, env))
@@ -0,0 +1,25 @@
+import importlib
+
+
+_engine_modules = {
+    "tree": "pycell.eval_",
+    "closures": "pycell.closures",
+    "vm": "pycell.vm",
+}
+
+
+def engine_names():
+    return sorted(_engine_modules.keys())
+
+
+def engine(name):
+    """
+    Find the module implementing the named evaluation engine.  Every engine
+    module provides eval_iter(exprs, env) and eval_list(exprs, env).
+    """
+    if name not in _engine_modules:
+        raise Exception(
+            "Unknown engine '%s'.  Choose from: %s." % (
+                name, ", ".join(engine_names()))
+        )
+    return importlib.import_module(_engine_modules[name])
@@ -1,6 +1,8 @@
-import inspect
-
 from pycell.env import Env
+from pycell.prologue.native.if_ import if_
+from pycell.prologue.native.set_ import set_
+from pycell.resolver import assigned_names
+from pycell.tail_call import TailCall
 
 
 def _operation(expr, env):
@@ -20,39 +22,253 @@ def _operation(expr, env):
 
 def fail_if_wrong_number_of_args(fn_name, params, args):
     if len(params) != len(args):
-        raise Exception((
-            "%d arguments passed to function %s, but it "
-            + "requires %d arguments."
-        ) % (len(args), fn_name, len(params)))
-
-
-def _function_call(expr, env):
-    fn = eval_expr(expr[1], env)
-    args = list((eval_expr(a, env) for a in expr[2]))
-    if fn[0] == "function":
-        params = fn[1]
-        fail_if_wrong_number_of_args(expr[1], params, args)
-        body = fn[2]
-        fn_env = fn[3]
-        new_env = Env(fn_env)
-        for p, a in zip(params, args):
-            new_env.set(p[1], a)
-        return eval_list(body, new_env)
-    elif fn[0] == "native":
-        py_fn = fn[1]
-        params = inspect.getargspec(py_fn).args
-        fail_if_wrong_number_of_args(expr[1], params[1:], args)
-        return fn[1](env, *args)
-    else:
+        _fail_wrong_number_of_args(fn_name, len(params), args)
+
+
+def fail_if_wrong_number_of_native_args(fn_name, arity, args):
+    if arity is not None and arity != len(args):
+        _fail_wrong_number_of_args(fn_name, arity, args)
+
+
+def _fail_wrong_number_of_args(fn_name, arity, args):
+    raise Exception((
+        "%d arguments passed to function %s, but it "
+        + "requires %d arguments."
+    ) % (len(args), fn_name, arity))
+
+
+_CO_VARARGS = 0x04  # As inspect.CO_VARARGS
+
+_FunctionType = type(lambda: None)  # As types.FunctionType
+
+
+def arity_of(py_fn):
+    """
+    The number of Cell arguments a Python function takes (not counting its
+    env), or None if it takes any number, via *args.
+    """
+    if type(py_fn) is not _FunctionType:
+        # Not a plain Python function (e.g. a bound method, whose __code__
+        # counts self), so ask inspect (which is slow to import, so it is
+        # only imported when needed).
+        import inspect
+        params = list(inspect.signature(py_fn).parameters.values())[1:]
+        if any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in params):
+            return None
+        return len(params)
+    code = py_fn.__code__
+    if code.co_flags & _CO_VARARGS:
+        return None
+    return code.co_argcount + code.co_kwonlyargcount - 1
+
+
+_arities = {}
+
+
+def native_arity(fn):
+    """
+    The arity of a native value.  Natives made by library.native carry it
+    with them; for any others it is worked out once and remembered.
+    """
+    if len(fn) > 2:
+        return fn[2]
+    py_fn = fn[1]
+    if py_fn not in _arities:
+        _arities[py_fn] = arity_of(py_fn)
+    return _arities[py_fn]
+
+
+_if_symbol = ("symbol", "if")
+
+
+def _is_if_form(expr):
+    """
+    Is this a call to if, by name, with both branches written out as
+    functions taking no arguments?
+    """
+    if expr[1] != _if_symbol:
+        return False
+    args = expr[2]
+    return (
+        len(args) == 3 and
+        args[1][0] == "function" and len(args[1][1]) == 0 and
+        args[2][0] == "function" and len(args[2][1]) == 0
+    )
+
+
+_assigns_cache = {}
+
+
+def _assigns(body):
+    cached = _assigns_cache.get(id(body))
+    if cached is None or cached[0] is not body:
+        cached = (body, len(assigned_names(body)) > 0)
+        _assigns_cache[id(body)] = cached
+    return cached[1]
+
+
+def _if_form_branch(expr, env):
+    """
+    Choose the branch of an if special form, without making function values
+    for the branches.  Returns the body of the branch and the environment
+    to run it in: the current one, unless the body assigns to anything.
+    """
+    args = expr[2]
+    t = eval_expr(args[0], env)
+    if t[0] != "number":
         raise Exception(
-            "Attempted to call something that is not a function: %s" %
-            str(fn)
+            (
+                "Only numbers may be passed to an if, but I was passed '%s'"
+            ) % str(t)
         )
+    body = args[1][2] if t[1] != 0 else args[2][2]
+    if _assigns(body):
+        env = Env(env)
+    return body, env
+
+
+def _plain_function_call(expr, env):
+    """
+    Calls in tail position (the last expression in a function body, or a
+    call handed back by a native as a TailCall) are made by going round the
+    loop again, instead of recursing, so they run in constant Python stack.
+
+    Calls to if with literal branches are treated as a special form, and
+    the chosen branch runs directly, also in tail position.
+    """
+    while True:
+        fn = eval_expr(expr[1], env)
+        if fn[0] == "native" and fn[1] is if_ and _is_if_form(expr):
+            body, env = _if_form_branch(expr, env)
+        else:
+            args = list((eval_expr(a, env) for a in expr[2]))
+            if fn[0] == "function":
+                params = fn[1]
+                fail_if_wrong_number_of_args(expr[1], params, args)
+                body = fn[2]
+                fn_env = fn[3]
+                env = Env(fn_env)
+                for p, a in zip(params, args):
+                    env.set(p[1], a)
+            elif fn[0] == "native":
+                arity = fn[2] if len(fn) > 2 else native_arity(fn)
+                fail_if_wrong_number_of_native_args(expr[1], arity, args)
+                ret = fn[1](env, *args)
+                if not isinstance(ret, TailCall):
+                    return ret
+                expr = ret.expr
+                env = ret.env
+                continue
+            else:
+                raise Exception(
+                    "Attempted to call something that is not a function: %s"
+                    % str(fn)
+                )
+        if len(body) == 0:
+            return ("none",)
+        for e in body[:-1]:
+            eval_expr(e, env)
+        expr = body[-1]
+        if expr[0] != "call":
+            return eval_expr(expr, env)
+
+
+_hooks = None
+
+
+def _hooked_function_call(expr, env):
+    """
+    The same as _plain_function_call, but telling _hooks whenever a
+    function or native starts or finishes, and whenever set is called.  A
+    call in tail position finishes the function it replaces.
+    """
+    hooks = _hooks
+    entered = None  # The function value running now, if any
+    ret = None
+    try:
+        while True:
+            fn = eval_expr(expr[1], env)
+            if fn[0] == "native" and fn[1] is if_ and _is_if_form(expr):
+                body, env = _if_form_branch(expr, env)
+            else:
+                args = list((eval_expr(a, env) for a in expr[2]))
+                if fn[0] == "function":
+                    params = fn[1]
+                    fail_if_wrong_number_of_args(expr[1], params, args)
+                    body = fn[2]
+                    fn_env = fn[3]
+                    env = Env(fn_env)
+                    for p, a in zip(params, args):
+                        env.set(p[1], a)
+                    if entered is not None:
+                        hooks.exit_function(entered, None)
+                    hooks.enter_function(fn, args)
+                    entered = fn
+                elif fn[0] == "native":
+                    arity = fn[2] if len(fn) > 2 else native_arity(fn)
+                    fail_if_wrong_number_of_native_args(expr[1], arity, args)
+                    hooks.enter_native(fn, args)
+                    try:
+                        ret = fn[1](env, *args)
+                    finally:
+                        hooks.exit_native(
+                            fn, None if isinstance(ret, TailCall) else ret)
+                    if fn[1] is set_:
+                        hooks.set(args[0][1], args[1], env)
+                    if not isinstance(ret, TailCall):
+                        return ret
+                    expr = ret.expr
+                    env = ret.env
+                    ret = None
+                    continue
+                else:
+                    raise Exception(
+                        "Attempted to call something that is not a function: "
+                        + str(fn)
+                    )
+            if len(body) == 0:
+                ret = ("none",)
+                return ret
+            for e in body[:-1]:
+                eval_expr(e, env)
+            expr = body[-1]
+            if expr[0] != "call":
+                ret = eval_expr(expr, env)
+                return ret
+    finally:
+        if entered is not None:
+            hooks.exit_function(entered, ret)
+
+
+# What eval_expr calls for a call expression.  install_hooks replaces it
+# (and eval_expr itself), so that there is no cost to hooks when there are
+# none.
+_function_call = _plain_function_call
+
+
+def install_hooks(hooks):
+    """
+    Tell hooks (a pycell.hooks.Hooks) about what this engine does, until
+    remove_hooks is called.
+    """
+    global eval_expr, _function_call, _hooks
+    _hooks = hooks
+    eval_expr = _hooked_eval_expr
+    _function_call = _hooked_function_call
+
+
+def remove_hooks():
+    global eval_expr, _function_call, _hooks
+    eval_expr = _plain_eval_expr
+    _function_call = _plain_function_call
+    _hooks = None
 
 
 def eval_expr(expr, env):
     typ = expr[0]
-    if typ == "number":
+    if typ == "constant":
+        return expr[1]
+    elif typ == "number":
         return ("number", float(expr[1]))
     elif typ == "string":
         return ("string", expr[1])
@@ -82,6 +298,19 @@ def eval_expr(expr, env):
         raise Exception("Unknown expression type: " + str(expr))
 
 
+_plain_eval_expr = eval_expr
+
+
+def _hooked_eval_expr(expr, env):
+    ret = _plain_eval_expr(expr, env)
+    typ = expr[0]
+    if typ == "assignment":
+        _hooks.assign(expr[1][1], ret, env)
+    elif typ == "function":
+        _hooks.make_function(ret)
+    return ret
+
+
 def eval_iter(exprs, env):
     for expr in exprs:
         yield eval_expr(expr, env)
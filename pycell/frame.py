@@ -0,0 +1,65 @@
+class Frame:
+    """
+    The environment for one call of a function, with its local symbols held
+    in a list at the positions given by its resolver.Scope.
+
+    Frames can also be used like an Env, by name, so that natives such as
+    set() work unchanged.  Names that are not in the Scope (e.g. added by a
+    native) are kept in a separate dict.
+    """
+
+    __slots__ = ("scope", "slots", "parent", "root", "extra")
+
+    def __init__(self, scope, parent):
+        self.scope = scope
+        self.slots = [None] * len(scope.names)
+        self.parent = parent
+        self.root = parent.root if type(parent) is Frame else parent
+        self.extra = None
+
+    @property
+    def stdin(self):
+        return self.root.stdin
+
+    @property
+    def stdout(self):
+        return self.root.stdout
+
+    @property
+    def stderr(self):
+        return self.root.stderr
+
+    @property
+    def items(self):
+        ret = {}
+        for name, value in zip(self.scope.names, self.slots):
+            if value is not None:
+                ret[name] = value
+        if self.extra is not None:
+            ret.update(self.extra)
+        return ret
+
+    def get(self, name):
+        slot = self.scope.index.get(name)
+        if slot is not None and self.slots[slot] is not None:
+            return self.slots[slot]
+        elif self.extra is not None and name in self.extra:
+            return self.extra[name]
+        else:
+            return self.parent.get(name)
+
+    def set(self, name, value):
+        slot = self.scope.index.get(name)
+        if slot is not None:
+            self.slots[slot] = value
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def contains(self, name):
+        slot = self.scope.index.get(name)
+        if slot is not None:
+            return self.slots[slot] is not None
+        else:
+            return self.extra is not None and name in self.extra
@@ -0,0 +1,179 @@
+"""
+An immutable hash map, stored as a hash array mapped trie: each node uses 5
+bits of the key's hash to choose a child, and a bitmap says which of its 32
+possible children are present, so only those need to be stored.
+
+Putting a key copies only the nodes on the path to it, and the new map
+shares everything else with the old one.  Keys whose hashes are entirely
+equal end up together in a _Collision node.
+"""
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+
+def _hash(key):
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+def _index(bitmap, bit):
+    return bin(bitmap & (bit - 1)).count("1")
+
+
+class _Node:
+
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap, children):
+        self.bitmap = bitmap
+        self.children = children  # Each a (key, value) tuple or a node
+
+
+class _Collision:
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries):
+        self.entries = entries
+
+
+def _merge(shift, entry1, hash1, entry2, hash2):
+    """
+    A node holding two entries whose hashes are the same below shift.
+    """
+    if shift >= _HASH_BITS:
+        return _Collision((entry1, entry2))
+    frag1 = (hash1 >> shift) & _MASK
+    frag2 = (hash2 >> shift) & _MASK
+    if frag1 == frag2:
+        return _Node(
+            1 << frag1,
+            (_merge(shift + _BITS, entry1, hash1, entry2, hash2),)
+        )
+    elif frag1 < frag2:
+        return _Node((1 << frag1) | (1 << frag2), (entry1, entry2))
+    else:
+        return _Node((1 << frag1) | (1 << frag2), (entry2, entry1))
+
+
+def _put(node, shift, h, key, value):
+    """
+    Returns the new node, and whether key was added (rather than replaced).
+    """
+    if type(node) is _Collision:
+        entries = node.entries
+        for i, entry in enumerate(entries):
+            if entry[0] == key:
+                return (
+                    _Collision(
+                        entries[:i] + ((key, value),) + entries[i + 1:]),
+                    False
+                )
+        return _Collision(entries + ((key, value),)), True
+
+    bit = 1 << ((h >> shift) & _MASK)
+    i = _index(node.bitmap, bit)
+    children = node.children
+    if not node.bitmap & bit:
+        return (
+            _Node(
+                node.bitmap | bit,
+                children[:i] + ((key, value),) + children[i:]
+            ),
+            True
+        )
+    child = children[i]
+    if type(child) is tuple:
+        if child[0] == key:
+            new_child = (key, value)
+            added = False
+        else:
+            new_child = _merge(
+                shift + _BITS, child, _hash(child[0]), (key, value), h)
+            added = True
+    else:
+        new_child, added = _put(child, shift + _BITS, h, key, value)
+    return (
+        _Node(node.bitmap, children[:i] + (new_child,) + children[i + 1:]),
+        added
+    )
+
+
+def _entries(node):
+    if type(node) is _Collision:
+        yield from node.entries
+    else:
+        for child in node.children:
+            if type(child) is tuple:
+                yield child
+            else:
+                yield from _entries(child)
+
+
+class HashMap:
+
+    __slots__ = ("count", "_root")
+
+    def __init__(self, count=0, root=_Node(0, ())):
+        self.count = count
+        self._root = root
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        if not isinstance(other, HashMap) or other.count != self.count:
+            return False
+        missing = object()
+        return all(
+            other.get(key, missing) == value for key, value in self.items()
+        )
+
+    def __iter__(self):
+        for key, _ in _entries(self._root):
+            yield key
+
+    def __repr__(self):
+        return "HashMap(%s)" % repr(dict(self.items()))
+
+    def __reduce__(self):
+        # Where keys go depends on their hashes, which for strings change
+        # from one Python process to the next, so pickle the items only.
+        return (_from_items, (list(self.items()),))
+
+    def items(self):
+        return _entries(self._root)
+
+    def get(self, key, default=None):
+        h = _hash(key)
+        node = self._root
+        shift = 0
+        while True:
+            if type(node) is _Collision:
+                for entry in node.entries:
+                    if entry[0] == key:
+                        return entry[1]
+                return default
+            bit = 1 << ((h >> shift) & _MASK)
+            if not node.bitmap & bit:
+                return default
+            child = node.children[_index(node.bitmap, bit)]
+            if type(child) is tuple:
+                return child[1] if child[0] == key else default
+            node = child
+            shift += _BITS
+
+    def put(self, key, value):
+        """
+        A new map with key set to value.
+        """
+        root, added = _put(self._root, 0, _hash(key), key, value)
+        return HashMap(self.count + 1 if added else self.count, root)
+
+
+def _from_items(items):
+    ret = HashMap()
+    for key, value in items:
+        ret = ret.put(key, value)
+    return ret
@@ -0,0 +1,70 @@
+"""
+Hooks let tools (profilers, tracers, coverage and so on) watch the tree
+engine evaluate a program, without changing it.
+
+Subclass Hooks, override the methods for the events you need, and pass an
+instance to pycell.run.run (or call its start and stop yourself).  While
+hooks are installed, the engine uses a copy of its evaluation loop that
+calls them; when they are removed it goes back to the plain loop, so
+programs run without hooks pay nothing for them.
+
+Values are passed to hooks as the engine holds them: tagged tuples like
+("number", 3.0).  Hooks must not change them.
+"""
+
+import pycell.eval_
+
+
+class Hooks:
+
+    def name_functions(self, exprs):
+        """
+        Called with the program's expressions (and the prologue's) before
+        it runs, for hooks that want to know what functions are called.
+        """
+
+    def start(self):
+        pycell.eval_.install_hooks(self)
+
+    def stop(self):
+        pycell.eval_.remove_hooks()
+
+    def make_function(self, fn):
+        """
+        The Cell function value fn was made, from a function expression.
+        """
+
+    def enter_function(self, fn, args):
+        """
+        The Cell function value fn was called with the values args.
+        """
+
+    def exit_function(self, fn, value):
+        """
+        The Cell function value fn returned value.  value is None if fn
+        finished by calling another function in tail position (which will
+        have its own enter_function), or by raising an exception.
+        """
+
+    def enter_native(self, fn, args):
+        """
+        The native value fn was called with the values args.
+        """
+
+    def exit_native(self, fn, value):
+        """
+        The native value fn returned value.  value is None if it handed
+        back a call to make in its place (as if does), or raised an
+        exception.
+        """
+
+    def assign(self, name, value, env):
+        """
+        The symbol name was assigned value, in env.
+        """
+
+    def set(self, name, value, env):
+        """
+        set() changed the existing symbol name to value.  env is where set()
+        was called from, not necessarily the Env that holds name.
+        """
@@ -0,0 +1,124 @@
+"""
+Saves a fully evaluated top-level Env to a file (an "image"), and loads it
+again, so a program can carry on from where another one finished without
+running it again.
+
+Images are pickles.  Everything reachable from the Env is saved (function
+values, the Envs and Frames they captured, and data structures) keeping
+any sharing between them, so set() on a shared symbol still affects every
+function that can see it.  A few things are saved by name instead:
+
+    - natives are saved by the name they are registered under, and
+      loaded as whatever is registered under that name now,
+    - the streams (stdin, stdout, stderr) are replaced with the ones given
+      when loading,
+    - the compiled bodies that engines keep in function values are left
+      out, and are compiled again when first called,
+    - lists made of pairs are saved as a flat list of their items, since
+      pickle would need to recurse once per pair.
+"""
+
+import pickle
+
+import pycell.library
+
+from pycell.bytecode import Code
+
+
+_magic = b"CELLIMG1"
+
+_streams = ("stdin", "stdout", "stderr")
+
+
+def _is_compiled_body(obj):
+    return type(obj) is Code or (
+        getattr(obj, "__module__", None) == "pycell.closures" and
+        getattr(obj, "__qualname__", None) == "_enter.<locals>.enter"
+    )
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, f, env):
+        pickle.Pickler.__init__(self, f, pickle.HIGHEST_PROTOCOL)
+        self.streams = [
+            (getattr(env, name), name)
+            for name in _streams
+            if getattr(env, name) is not None
+        ]
+        self.native_names = {
+            id(value[1]): name
+            for name, value in pycell.library.natives.items()
+        }
+
+    def persistent_id(self, obj):
+        for stream, name in self.streams:
+            if obj is stream:
+                return ("stream", name)
+        name = self.native_names.get(id(obj))
+        if name is not None:
+            return ("native", name)
+        if _is_compiled_body(obj):
+            return ("compiled_body",)
+        if (
+            type(obj) is tuple and
+            len(obj) == 3 and
+            obj[0] == "pair" and
+            obj[2][0] == "pair"
+        ):
+            items = []
+            while obj[0] == "pair":
+                items.append(obj[1])
+                obj = obj[2]
+            return ("pairs", items, obj)
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, f, streams):
+        pickle.Unpickler.__init__(self, f)
+        self.streams = streams
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "stream":
+            return self.streams[pid[1]]
+        elif kind == "native":
+            native = pycell.library.natives.get(pid[1])
+            if native is None:
+                raise Exception(
+                    "The image uses a native called '%s', " % pid[1]
+                    + "which does not exist."
+                )
+            return native[1]
+        elif kind == "compiled_body":
+            return None
+        elif kind == "pairs":
+            ret = pid[2]
+            for item in reversed(pid[1]):
+                ret = ("pair", item, ret)
+            return ret
+        else:
+            raise pickle.UnpicklingError("Unknown persistent id: %s" % pid)
+
+
+def save_image(filename, env):
+    with open(filename, "wb") as f:
+        f.write(_magic)
+        _Pickler(f, env).dump(env)
+
+
+def load_image(filename, stdin, stdout, stderr):
+    """
+    Load the Env saved in filename.  Any natives registered since it was
+    saved are added to it.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(_magic)) != _magic:
+            raise Exception("'%s' is not a Cell image." % filename)
+        env = _Unpickler(
+            f, {"stdin": stdin, "stdout": stdout, "stderr": stderr}
+        ).load()
+    for name, value in pycell.library.natives.items():
+        if not env.contains(name):
+            env.set(name, value)
+    return env
@@ -23,7 +23,7 @@ def _scan_string(delim, chars):
     return ret
 
 
-def lex(chars_iter):
+def _lex_chars(chars_iter):
     chars = PeekableStream(chars_iter)
     while chars.next is not None:
         c = chars.move_next()
@@ -38,3 +38,95 @@ def lex(chars_iter):
             raise Exception("Tab characters are not allowed in Cell.")
         else:
             raise Exception("Unrecognised character: '" + c + "'.")
+
+
+# Matches any single token, or a run of white space, or else any single
+# character, so that every character of the text is in exactly one match.
+_token_re = re.compile(
+    r"[(){},;=:+*/-]|[_a-zA-Z][_a-zA-Z0-9]*|[.0-9]+"
+    r"""|"[^"]*"|'[^']*'|[ \n]+|.""",
+    re.DOTALL
+)
+
+
+def _kinds():
+    ret = {}
+    for c in "(){},;=:":
+        ret[c] = "special"
+    for c in "+-*/":
+        ret[c] = "operation"
+    for c in "_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        ret[c] = "symbol"
+    for c in ".0123456789":
+        ret[c] = "number"
+    for c in "'\"":
+        ret[c] = "string"
+    for c in " \n":
+        ret[c] = "space"
+    return ret
+
+
+# The kind of each match of _token_re, by its first character
+_kind_of = _kinds()
+
+
+def _lex_buffer(text, final):
+    """
+    Yield the tokens in text, and return the position lexing stopped at.
+
+    If final is False, more text may follow, so a token that reaches the
+    end of text might not be complete.  It is not yielded, and lexing stops
+    where it starts.
+    """
+    kind_of = _kind_of
+    pos = 0
+    end = len(text)
+    for tok in _token_re.findall(text):
+        kind = kind_of.get(tok[0])
+        if kind == "special":
+            yield (tok, "")
+        elif kind == "symbol" or kind == "number":
+            if not final and pos + len(tok) == end:
+                return pos
+            yield (kind, tok)
+        elif kind == "space":
+            pass
+        elif kind == "operation":
+            yield ("operation", tok)
+        elif kind == "string" and len(tok) > 1:
+            yield ("string", tok[1:-1])
+        elif kind == "string":
+            if final:
+                raise Exception("A string ran off the end of the program.")
+            return pos
+        elif tok == "\t":
+            raise Exception("Tab characters are not allowed in Cell.")
+        else:
+            raise Exception("Unrecognised character: '" + tok + "'.")
+        pos += len(tok)
+    return pos
+
+
+def lex_chunks(chunks):
+    """
+    Lex a program supplied as an iterable of strings of any length, e.g.
+    blocks read from a file.  Tokens may be split across chunks.
+    """
+    rest = ""
+    for chunk in chunks:
+        text = rest + chunk if rest else chunk
+        pos = yield from _lex_buffer(text, False)
+        rest = text[pos:]
+    yield from _lex_buffer(rest, True)
+
+
+def lex(chars_iter):
+    """
+    Lex a program, given as a string or an iterable of characters.  A whole
+    string is lexed in one pass with a regular expression; characters are
+    lexed one at a time as they arrive, for interactive use.
+    """
+    if isinstance(chars_iter, str):
+        return _lex_buffer(chars_iter, True)
+    else:
+        return _lex_chars(chars_iter)
@@ -1,39 +1,119 @@
 
-from pycell.lexer import lex
-from pycell.parser import parse
-from pycell.eval_ import eval_list
+from pycell.engines import engine as find_engine
+from pycell.eval_ import arity_of
 
 import pycell.prologue.native.char_at
 import pycell.prologue.native.concat
 import pycell.prologue.native.equals
 import pycell.prologue.native.if_
 import pycell.prologue.native.len_
+import pycell.prologue.native.lists
+import pycell.prologue.native.maps
+import pycell.prologue.native.pairs
 import pycell.prologue.native.print_
 import pycell.prologue.native.set_
+import pycell.prologue.native.string_builders
+import pycell.prologue.native.strings
+import pycell.prologue.native.vectors
+
+import pycell.prologue.prologue_ast
 
 import pycell.prologue.cell.a00_not
-import pycell.prologue.cell.chars_in
-import pycell.prologue.cell.pairs
 import pycell.prologue.cell.lists
 
 
-def import_(env):
-    env.set("char_at", ("native", pycell.prologue.native.char_at.char_at))
-    env.set("concat",  ("native", pycell.prologue.native.concat.concat))
-    env.set("equals",  ("native", pycell.prologue.native.equals.equals))
-    env.set("if",      ("native", pycell.prologue.native.if_.if_))
-    env.set("len",     ("native", pycell.prologue.native.len_.len_))
-    env.set("print",   ("native", pycell.prologue.native.print_.print_))
-    env.set("set",     ("native", pycell.prologue.native.set_.set_))
-    env.set("None",    ("none",))
+natives = {}
+
+
+def native(py_fn):
+    """
+    Make the Cell value for a native function.  Its arity is worked out
+    now, once, so that calling it needs no introspection.
+    """
+    return ("native", py_fn, arity_of(py_fn))
+
+
+def register_native(name, py_fn):
+    """
+    Add a native function to the ones every program gets.  A native whose
+    Python function takes *args is variadic, and may be called with any
+    number of arguments.
+    """
+    natives[name] = native(py_fn)
+
+
+register_native("char_at", pycell.prologue.native.char_at.char_at)
+register_native("concat",  pycell.prologue.native.concat.concat)
+register_native("equals",  pycell.prologue.native.equals.equals)
+register_native("if",      pycell.prologue.native.if_.if_)
+register_native("len",     pycell.prologue.native.len_.len_)
+register_native("print",   pycell.prologue.native.print_.print_)
+register_native("set",     pycell.prologue.native.set_.set_)
+
+register_native("pair",    pycell.prologue.native.pairs.pair)
+register_native("first",   pycell.prologue.native.pairs.first)
+register_native("second",  pycell.prologue.native.pairs.second)
+
+register_native("list",    pycell.prologue.native.lists.list_)
+register_native("list0",   pycell.prologue.native.lists.list0)
+register_native("list1",   pycell.prologue.native.lists.list1)
+register_native("list2",   pycell.prologue.native.lists.list2)
+register_native("list3",   pycell.prologue.native.lists.list3)
+register_native("list4",   pycell.prologue.native.lists.list4)
+register_native("list5",   pycell.prologue.native.lists.list5)
 
-    eval_list(parse(lex(as_text(env))), env)
+register_native("vec",     pycell.prologue.native.vectors.vec)
+register_native("push",    pycell.prologue.native.vectors.push)
+register_native("nth",     pycell.prologue.native.vectors.nth)
+register_native("vlen",    pycell.prologue.native.vectors.vlen)
+register_native("vslice",  pycell.prologue.native.vectors.vslice)
+register_native("vseq",    pycell.prologue.native.vectors.vseq)
+
+register_native("map_new",  pycell.prologue.native.maps.map_new)
+register_native("map_get",  pycell.prologue.native.maps.map_get)
+register_native("map_put",  pycell.prologue.native.maps.map_put)
+register_native("map_has",  pycell.prologue.native.maps.map_has)
+register_native("map_len",  pycell.prologue.native.maps.map_len)
+register_native("map_keys", pycell.prologue.native.maps.map_keys)
+
+register_native("sb_new",    pycell.prologue.native.string_builders.sb_new)
+register_native("sb_append", pycell.prologue.native.string_builders.sb_append)
+register_native("sb_str",    pycell.prologue.native.string_builders.sb_str)
+
+register_native("chars_in",    pycell.prologue.native.strings.chars_in)
+register_native("substring",   pycell.prologue.native.strings.substring)
+register_native("find",        pycell.prologue.native.strings.find)
+register_native("split",       pycell.prologue.native.strings.split)
+register_native("join",        pycell.prologue.native.strings.join)
+register_native("starts_with", pycell.prologue.native.strings.starts_with)
+register_native("to_number",   pycell.prologue.native.strings.to_number)
+register_native("to_string",   pycell.prologue.native.strings.to_string)
+
+
+def import_(env, engine="tree"):
+    for name, value in natives.items():
+        env.set(name, value)
+    env.set("None", ("none",))
+
+    find_engine(engine).eval_list(pycell.prologue.prologue_ast.exprs, env)
+
+
+def prologue_unchanged(env):
+    """
+    Whether the natives that optimise.py folds calls to still have their
+    original values in env, e.g. in an Env loaded from an image.
+    """
+    return all(
+        env.get(name) == natives[name] for name in ("equals", "if", "set")
+    )
 
 
 def as_text(env):
+    """
+    The source of the prologue's Cell code.  import_ uses the prebuilt
+    version of this in prologue/prologue_ast.py, made by prologue/build.py.
+    """
     return (
         pycell.prologue.cell.a00_not.not_
-        + pycell.prologue.cell.chars_in.chars_in
-        + pycell.prologue.cell.pairs.pairs
         + pycell.prologue.cell.lists.lists
     )
@@ -0,0 +1,176 @@
+"""
+Simplifies parsed expressions before they are evaluated or compiled.
+
+Literals become ("constant", value) nodes holding the value they evaluate
+to, so it is not worked out again each time they run.  Arithmetic on
+constant numbers is done here, once.
+
+If the program can't have changed what "equals" and "if" mean, calls to
+them with constant arguments are worked out here too.
+"""
+
+
+_folded_natives = ("equals", "if")
+
+
+def _is_number(expr):
+    return expr[0] == "constant" and expr[1][0] == "number"
+
+
+def _is_zero_arg_function(expr):
+    return expr[0] == "function" and len(expr[1]) == 0
+
+
+class _PrologueUse:
+    """
+    Works out whether a program could change the meaning of the prologue
+    names we fold, either by defining them in an inner scope or by set().
+    """
+
+    def __init__(self):
+        self.safe = True
+
+    def scan(self, expr):
+        stack = [expr]
+        while len(stack) > 0:
+            expr = stack.pop()
+            typ = expr[0]
+            if typ == "symbol":
+                if expr[1] == "set":
+                    self.safe = False  # Used as a value, so could be anything
+            elif typ == "assignment":
+                if expr[1][1] in _folded_natives + ("set",):
+                    self.safe = False
+                stack.append(expr[2])
+            elif typ == "operation":
+                stack.append(expr[2])
+                stack.append(expr[3])
+            elif typ == "call":
+                args = expr[2]
+                if expr[1] == ("symbol", "set"):
+                    if (
+                        len(args) == 0 or
+                        args[0][0] != "string" or
+                        args[0][1] in _folded_natives
+                    ):
+                        self.safe = False
+                else:
+                    stack.append(expr[1])
+                stack.extend(args)
+            elif typ == "function":
+                for param in expr[1]:
+                    if param[1] in _folded_natives + ("set",):
+                        self.safe = False
+                stack.extend(expr[2])
+
+
+class _Optimiser:
+    def __init__(self, fold_prologue):
+        self.fold_prologue = fold_prologue
+
+    def expr(self, expr):
+        """
+        Optimise expr, working through it with explicit stacks instead of
+        recursing, so that however deeply it nests it uses no more of the
+        Python stack.  todo holds the expressions still to optimise, each
+        with whether its parts are optimised already, and done holds the
+        optimised parts until the expression they belong to takes them.
+        """
+        todo = [(expr, False)]
+        done = []
+        while len(todo) > 0:
+            expr, parts_done = todo.pop()
+            typ = expr[0]
+            if parts_done:
+                done.append(self.combine(expr, done))
+            elif typ == "number":
+                done.append(("constant", ("number", float(expr[1]))))
+            elif typ == "string":
+                done.append(("constant", ("string", expr[1])))
+            elif typ == "operation":
+                todo.append((expr, True))
+                todo.append((expr[3], False))
+                todo.append((expr[2], False))
+            elif typ == "assignment":
+                todo.append((expr, True))
+                todo.append((expr[2], False))
+            elif typ == "call":
+                todo.append((expr, True))
+                for arg in reversed(expr[2]):
+                    todo.append((arg, False))
+                todo.append((expr[1], False))
+            elif typ == "function":
+                todo.append((expr, True))
+                for e in reversed(expr[2]):
+                    todo.append((e, False))
+            else:
+                done.append(expr)
+        return done[0]
+
+    def combine(self, expr, done):
+        """
+        The optimised version of expr, taking its optimised parts off the
+        end of done.
+        """
+        typ = expr[0]
+        if typ == "operation":
+            arg2 = done.pop()
+            arg1 = done.pop()
+            return self.operation(expr[1], arg1, arg2)
+        elif typ == "assignment":
+            return ("assignment", expr[1], done.pop())
+        start = len(done) - len(expr[2])
+        parts = done[start:]
+        del done[start:]
+        if typ == "call":
+            return self.call(done.pop(), parts)
+        else:  # function
+            return ("function", expr[1], parts)
+
+    def operation(self, op, arg1, arg2):
+        if _is_number(arg1) and _is_number(arg2):
+            n1 = arg1[1][1]
+            n2 = arg2[1][1]
+            if op == "+":
+                return ("constant", ("number", n1 + n2))
+            elif op == "-":
+                return ("constant", ("number", n1 - n2))
+            elif op == "*":
+                return ("constant", ("number", n1 * n2))
+            elif op == "/" and n2 != 0:
+                return ("constant", ("number", n1 / n2))
+        return ("operation", op, arg1, arg2)
+
+    def call(self, fn, args):
+        if self.fold_prologue and fn == ("symbol", "equals"):
+            if len(args) == 2 and all(a[0] == "constant" for a in args):
+                return (
+                    "constant",
+                    ("number", 1 if args[0][1] == args[1][1] else 0)
+                )
+        elif self.fold_prologue and fn == ("symbol", "if"):
+            if (
+                len(args) == 3 and
+                _is_number(args[0]) and
+                _is_zero_arg_function(args[1]) and
+                _is_zero_arg_function(args[2])
+            ):
+                chosen = args[1] if args[0][1][1] != 0 else args[2]
+                return ("call", chosen, [])
+        return ("call", fn, args)
+
+
+def optimise(exprs, fold_prologue=True):
+    """
+    Optimise a whole program.  If fold_prologue is True, the program will
+    run with the prologue's equals and if defined at the top level.  exprs
+    may be an iterator, but all of it is read before anything is returned.
+    """
+    exprs = list(exprs)
+    if fold_prologue:
+        use = _PrologueUse()
+        for expr in exprs:
+            use.scan(expr)
+        fold_prologue = use.safe
+    optimiser = _Optimiser(fold_prologue)
+    return [optimiser.expr(e) for e in exprs]
@@ -2,70 +2,120 @@
 from pycell.peekablestream import PeekableStream
 
 
+# The separator and end tokens of each kind of list
+_list_tokens = {
+    "call": (",", ")"),
+    "params": (",", ")"),
+    "body": (";", "}"),
+}
+
+
 class Parser:
+    """
+    Parses expressions without recursion: work that would wait for an
+    inner expression to be parsed (the left side of an operation, the
+    target of an assignment, or a list of arguments, parameters or
+    statements) is pushed onto a stack instead.
+    """
+
     def __init__(self, tokens, stop_at):
         self.tokens = tokens
         self.stop_at = stop_at
 
     def next_expression(self, prev):
-        self.fail_if_at_end(";")
-        typ, value = self.tokens.next
-        if typ in self.stop_at:
-            return prev
-        self.tokens.move_next()
-        if typ in ("number", "string", "symbol") and prev is None:
-            return self.next_expression((typ, value))
-        elif typ == "operation":
-            nxt = self.next_expression(None)
-            return self.next_expression(("operation", value, prev, nxt))
-        elif typ == "(":
-            args = self.multiple_expressions(",", ")")
-            return self.next_expression(("call", prev, args))
-        elif typ == "{":
-            params = self.parameters_list()
-            body = self.multiple_expressions(";", "}")
-            return self.next_expression(("function", params, body))
-        elif typ == "=":
-            if prev[0] != "symbol":
-                raise Exception("You can't assign to anything except a symbol.")
-            nxt = self.next_expression(None)
-            return self.next_expression(("assignment", prev, nxt))
-        else:
-            raise Exception("Unexpected token: " + str((typ, value)))
+        tokens = self.tokens
+        stop_at = self.stop_at
+        stack = []
+        while True:
+            token = tokens.next
+            if token is None:
+                self.fail_if_at_end(";")
+            typ, value = token
+            if typ in stop_at:
+                if len(stack) == 0:
+                    return prev
+                frame = stack.pop()
+                kind = frame[0]
+                if kind == "operation":
+                    prev = ("operation", frame[1], frame[2], prev)
+                elif kind == "assignment":
+                    prev = ("assignment", frame[1], prev)
+                else:
+                    prev, stop_at = self.list_item(prev, typ, frame, stack)
+                continue
+            tokens.move_next()
+            if typ in ("number", "string", "symbol") and prev is None:
+                prev = (typ, value)
+            elif typ == "operation":
+                stack.append(("operation", value, prev))
+                prev = None
+            elif typ == "(":
+                prev, stop_at = self.open_list("call", prev, stack, stop_at)
+            elif typ == "{":
+                if self.tokens.next[0] != ":":
+                    # If there's no colon, this function takes no args
+                    prev, stop_at = self.open_list("body", [], stack, stop_at)
+                else:
+                    self.tokens.move_next()
+                    if self.tokens.next[0] != "(":
+                        raise Exception(
+                            "':' must be followed by '(' in a function.")
+                    self.tokens.move_next()
+                    prev, stop_at = self.open_list(
+                        "params", None, stack, stop_at)
+            elif typ == "=":
+                if prev[0] != "symbol":
+                    raise Exception(
+                        "You can't assign to anything except a symbol.")
+                stack.append(("assignment", prev))
+                prev = None
+            else:
+                raise Exception("Unexpected token: " + str((typ, value)))
 
-    def parameters_list(self):
-        if self.tokens.next[0] != ":":
-            return []  # If there's no colon, this function takes no args
-        self.tokens.move_next()
-        typ = self.tokens.next[0]
-        if typ != "(":
-            raise Exception("':' must be followed by '(' in a function.")
+    def open_list(self, kind, data, stack, stop_at):
+        """
+        Start parsing a list of the given kind, after its opening token.
+        Returns the expression so far and the tokens to stop at: either the
+        finished expression, if the list was empty, or None and the list's
+        separators, with a frame for the list pushed onto stack.
+        """
+        sep, end = _list_tokens[kind]
+        self.fail_if_at_end(end)
+        if self.tokens.next[0] != end:
+            stack.append((kind, data, [], stop_at))
+            return None, (sep, end)
         self.tokens.move_next()
-        ret = self.multiple_expressions(",", ")")
-        for param in ret:
-            if param[0] != "symbol":
-                raise Exception(
-                    "Only symbols are allowed in function parameter lists."
-                    + " I found: " + str(param) + "."
-                )
-        return ret
+        return self.close_list(kind, data, [], stack, stop_at)
 
-    def multiple_expressions(self, sep, end):
-        ret = []
+    def list_item(self, item, typ, frame, stack):
+        """
+        Handle reaching the separator or end token typ after an item of the
+        list described by frame.
+        """
+        kind, data, items, outer_stop_at = frame
+        end = _list_tokens[kind][1]
+        if item is not None:
+            items.append(item)
+        self.tokens.move_next()
         self.fail_if_at_end(end)
-        typ = self.tokens.next[0]
-        if typ == end:
-            self.tokens.move_next()
+        if typ != end:
+            stack.append(frame)
+            return None, _list_tokens[kind]
+        return self.close_list(kind, data, items, stack, outer_stop_at)
+
+    def close_list(self, kind, data, items, stack, stop_at):
+        if kind == "call":
+            return ("call", data, items), stop_at
+        elif kind == "body":
+            return ("function", data, items), stop_at
         else:
-            arg_parser = Parser(self.tokens, (sep, end))
-            while typ != end:
-                p = arg_parser.next_expression(None)
-                if p is not None:
-                    ret.append(p)
-                typ = self.tokens.next[0]
-                self.tokens.move_next()
-                self.fail_if_at_end(end)
-        return ret
+            for param in items:
+                if param[0] != "symbol":
+                    raise Exception(
+                        "Only symbols are allowed in function parameter lists."
+                        + " I found: " + str(param) + "."
+                    )
+            return self.open_list("body", items, stack, stop_at)
 
     def fail_if_at_end(self, expected):
         if self.tokens.next is None:
@@ -0,0 +1,195 @@
+"""
+A deterministic profiler for programs run by the tree engine, for
+--profile.
+
+It is a set of pycell.hooks.Hooks: while it is running, eval_ tells it
+whenever a function or native is called and when it returns, and it counts
+the calls to each and how long they took.  Functions are named after the
+symbol they were assigned to (e.g. "fib", or "outer.inner" for one defined
+inside another); functions that are never assigned are numbered within the
+function that contains them, e.g. "outer.{1}".  The lexer doesn't keep
+track of line numbers, so there are no source positions.
+
+The times for each function are:
+
+    - inclusive: from when it was called until it returned, counting
+      recursive calls only once,
+    - exclusive: the same, minus the time spent in the functions and
+      natives it called.
+"""
+
+import time
+
+import pycell.library
+
+from pycell.hooks import Hooks
+
+
+class _Stats:
+
+    __slots__ = ("calls", "inclusive", "exclusive", "active")
+
+    def __init__(self):
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.active = 0  # How many calls to this are running right now
+
+
+class FunctionNames:
+    """
+    The names functions and natives are reported under by the profilers.
+    """
+
+    def __init__(self):
+        self._functions = {}  # id(function body) -> (body, name)
+        self._natives = {
+            id(value[1]): name
+            for name, value in pycell.library.natives.items()
+        }
+
+    def add(self, exprs):
+        """
+        Find the name of every function in the (parsed, unresolved)
+        expressions exprs.
+        """
+        numbered = {}
+        todo = [(expr, None) for expr in reversed(exprs)]
+        while len(todo) > 0:
+            expr, outer = todo.pop()
+            typ = expr[0]
+            if typ == "assignment" and expr[2][0] == "function":
+                name = expr[1][1]
+                if outer is not None:
+                    name = outer + "." + name
+                self._add_function(expr[2], name, todo)
+            elif typ == "assignment":
+                todo.append((expr[2], outer))
+            elif typ == "function":
+                n = numbered.get(outer, 0) + 1
+                numbered[outer] = n
+                name = "{%d}" % n
+                if outer is not None:
+                    name = outer + "." + name
+                self._add_function(expr, name, todo)
+            elif typ == "call":
+                for arg in reversed(expr[2]):
+                    todo.append((arg, outer))
+                todo.append((expr[1], outer))
+            elif typ == "operation":
+                todo.append((expr[3], outer))
+                todo.append((expr[2], outer))
+
+    def _add_function(self, fn, name, todo):
+        body = fn[2]
+        # Keep body alive, so that its id stays unique
+        self._functions[id(body)] = (body, name)
+        for expr in reversed(body):
+            todo.append((expr, name))
+
+    def function(self, body):
+        named = self._functions.get(id(body))
+        if named is None or named[0] is not body:
+            return "<unknown>"
+        return named[1]
+
+    def native(self, py_fn):
+        name = self._natives.get(id(py_fn))
+        if name is None:
+            name = getattr(py_fn, "__name__", "<unknown>")
+        return name
+
+
+class Profiler(Hooks):
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.functions = {}  # name -> _Stats
+        self.natives = {}    # name -> _Stats
+        self.names = FunctionNames()
+        self._stack = []     # [stats, start time, time spent in callees]
+
+    def name_functions(self, exprs):
+        """
+        Find the name of every function in exprs, so that calls to them
+        can be reported by name.
+        """
+        self.names.add(exprs)
+
+    def enter_function(self, fn, args):
+        self._push(self.functions, self.names.function(fn[2]))
+
+    def enter_native(self, fn, args):
+        self._push(self.natives, self.names.native(fn[1]))
+
+    def _push(self, table, name):
+        stats = table.get(name)
+        if stats is None:
+            stats = _Stats()
+            table[name] = stats
+        stats.active += 1
+        self._stack.append([stats, self.clock(), 0.0])
+
+    def exit_function(self, fn, value):
+        self._pop()
+
+    def exit_native(self, fn, value):
+        self._pop()
+
+    def _pop(self):
+        now = self.clock()
+        stats, start, callees = self._stack.pop()
+        total = now - start
+        stats.calls += 1
+        stats.exclusive += total - callees
+        stats.active -= 1
+        if stats.active == 0:
+            stats.inclusive += total
+        if len(self._stack) > 0:
+            self._stack[-1][2] += total
+
+    def report(self, out):
+        """
+        Write the functions and natives called, most exclusive time first.
+        """
+        for title, table in (
+            ("Functions", self.functions), ("Natives", self.natives)
+        ):
+            out.write("%s: times in ms\n" % title)
+            out.write("   calls   inclusive   exclusive  name\n")
+            for name, stats in sorted(
+                table.items(), key=lambda item: (-item[1].exclusive, item[0])
+            ):
+                out.write(
+                    "%8d %11.3f %11.3f  %s\n" % (
+                        stats.calls,
+                        stats.inclusive * 1000,
+                        stats.exclusive * 1000,
+                        name,
+                    )
+                )
+
+    def pstats_dict(self):
+        """
+        The results in the form the standard pstats module loads from a
+        file written with marshal, so they can be read by tools that
+        understand Python profiles.
+        """
+        ret = {}
+        for filename, table in (
+            ("<cell>", self.functions), ("<native>", self.natives)
+        ):
+            for name, stats in table.items():
+                ret[(filename, 0, name)] = (
+                    stats.calls,
+                    stats.calls,
+                    stats.exclusive,
+                    stats.inclusive,
+                    {},
+                )
+        return ret
+
+    def write_pstats(self, filename):
+        import marshal
+        with open(filename, "wb") as f:
+            marshal.dump(self.pstats_dict(), f)
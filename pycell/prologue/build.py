@@ -0,0 +1,39 @@
+"""
+Generates prologue_ast.py, the prologue's Cell code already lexed, parsed
+and optimised, so that starting the interpreter doesn't have to.
+
+Run this (or "make prologue") after changing anything in prologue/cell:
+
+    python3 -m pycell.prologue.build
+"""
+
+import os
+import pprint
+
+from pycell.lexer import lex
+from pycell.optimise import optimise
+from pycell.parser import parse
+
+
+ast_file = os.path.join(os.path.dirname(__file__), "prologue_ast.py")
+
+
+def module_source():
+    from pycell.library import as_text
+    exprs = optimise(parse(lex(as_text(None))), fold_prologue=False)
+    return (
+        "# Generated by pycell/prologue/build.py from the code in"
+        + " pycell/prologue/cell.\n"
+        + "# Do not edit.\n"
+        + "\n"
+        + "exprs = %s\n" % pprint.pformat(exprs, width=72)
+    )
+
+
+def main():
+    with open(ast_file, "w") as f:
+        f.write(module_source())
+
+
+if __name__ == "__main__":
+    main()
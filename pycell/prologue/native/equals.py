@@ -1,3 +1,20 @@
-
 def equals(env, val1, val2):
-    return ("number", 1 if val1 == val2 else 0)
+    return ("number", 1 if _equal(val1, val2) else 0)
+
+
+def _equal(val1, val2):
+    """
+    Pairs are equal if their contents are.  They are compared one by one
+    here, since == on the tuples would recurse once per item of a list.
+    """
+    todo = [(val1, val2)]
+    while len(todo) > 0:
+        val1, val2 = todo.pop()
+        if val1 is val2:
+            continue
+        if val1[0] == "pair" and val2[0] == "pair":
+            todo.append((val1[2], val2[2]))
+            todo.append((val1[1], val2[1]))
+        elif val1 != val2:
+            return False
+    return True
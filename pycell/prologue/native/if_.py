@@ -1,5 +1,5 @@
 
-from pycell.eval_ import eval_expr
+from pycell.tail_call import TailCall
 
 def if_(env, t, then_fn, else_fn):
     if t[0] != "number":
@@ -9,4 +9,6 @@ def if_(env, t, then_fn, else_fn):
             ) % str(t)
         )
     to_call = then_fn if t[1] != 0 else else_fn
-    return eval_expr(("call", to_call, []), env)
+    # A constant, so that the value is called as it is, with the
+    # environment it was made in
+    return TailCall(("call", ("constant", to_call), []), env)
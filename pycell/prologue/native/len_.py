@@ -1,5 +1,8 @@
 
 def len_(env, expr):
-    if expr[0] != "string":
+    if expr[0] == "string":
+        return ("number", len(expr[1]))
+    elif expr[0] == "string_builder":
+        return ("number", expr[1].length)
+    else:
         raise Exception("len() can only be called for a string.")
-    return ("number", len(expr[1]))
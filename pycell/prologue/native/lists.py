@@ -0,0 +1,33 @@
+
+_none = ("none",)
+
+
+def list_(env, *items):
+    ret = _none
+    for item in reversed(items):
+        ret = ("pair", item, ret)
+    return ret
+
+
+def list0(env):
+    return _none
+
+
+def list1(env, a):
+    return ("pair", a, _none)
+
+
+def list2(env, a, b):
+    return ("pair", a, ("pair", b, _none))
+
+
+def list3(env, a, b, c):
+    return ("pair", a, ("pair", b, ("pair", c, _none)))
+
+
+def list4(env, a, b, c, d):
+    return list_(env, a, b, c, d)
+
+
+def list5(env, a, b, c, d, e):
+    return list_(env, a, b, c, d, e)
@@ -0,0 +1,57 @@
+from pycell.hash_map import HashMap
+from pycell.vector import Vector
+
+
+def _check_map(fn_name, m):
+    if m[0] != "map":
+        raise Exception(
+            "%s() must be given a map, but was given: %s" % (fn_name, str(m))
+        )
+
+
+def _check_key(fn_name, key):
+    if key[0] not in ("string", "number"):
+        raise Exception(
+            "%s() keys must be strings or numbers, but was given: %s" % (
+                fn_name, str(key))
+        )
+
+
+def map_new(env):
+    return ("map", HashMap())
+
+
+def map_get(env, m, key):
+    _check_map("map_get", m)
+    _check_key("map_get", key)
+    return m[1].get(key, ("none",))
+
+
+def map_put(env, m, key, value):
+    _check_map("map_put", m)
+    _check_key("map_put", key)
+    return ("map", m[1].put(key, value))
+
+
+def map_has(env, m, key):
+    _check_map("map_has", m)
+    _check_key("map_has", key)
+    return ("number", 0 if m[1].get(key) is None else 1)
+
+
+def map_len(env, m):
+    _check_map("map_len", m)
+    return ("number", float(m[1].count))
+
+
+def map_keys(env, m):
+    """
+    A sequence of the keys in m, in no particular order, for use with
+    first, second and for.
+    """
+    _check_map("map_keys", m)
+    keys = Vector.of(m[1])
+    if keys.count == 0:
+        return ("none",)
+    else:
+        return ("vector_seq", keys, 0)
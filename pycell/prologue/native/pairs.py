@@ -0,0 +1,50 @@
+
+def pair(env, first, second):
+    return ("pair", first, second)
+
+
+def _fail_not_a_pair(fn_name, p):
+    raise Exception(
+        "%s() must be given a pair, but was given: %s" % (fn_name, str(p))
+    )
+
+
+def first(env, p):
+    typ = p[0]
+    if typ == "pair":
+        return p[1]
+    elif typ == "vector_seq":
+        return p[1].nth(p[2])
+    elif typ == "string_seq":
+        return ("string", p[1][p[2]])
+    else:
+        _fail_not_a_pair("first", p)
+
+
+def second(env, p):
+    typ = p[0]
+    if typ == "pair":
+        return p[2]
+    elif typ == "vector_seq":
+        i = p[2] + 1
+        return ("vector_seq", p[1], i) if i < p[1].count else ("none",)
+    elif typ == "string_seq":
+        i = p[2] + 1
+        return ("string_seq", p[1], i) if i < len(p[1]) else ("none",)
+    else:
+        _fail_not_a_pair("second", p)
+
+
+def items_of(fn_name, p):
+    """
+    The items in a list (or anything else first and second understand),
+    one by one, without recursion.
+    """
+    while p[0] != "none":
+        if p[0] not in ("pair", "vector_seq", "string_seq"):
+            raise Exception(
+                "%s() must be given a list, but was given: %s" % (
+                    fn_name, str(p))
+            )
+        yield first(None, p)
+        p = second(None, p)
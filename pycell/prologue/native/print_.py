@@ -12,6 +12,18 @@ def _strvalue(value):
         return "<function>"
     elif typ == "native":
         return "<native function>"
+    elif typ == "pair":
+        return "<pair>"
+    elif typ == "vector":
+        return "<vector>"
+    elif typ == "vector_seq":
+        return "<sequence>"
+    elif typ == "string_seq":
+        return "<sequence>"
+    elif typ == "map":
+        return "<map>"
+    elif typ == "string_builder":
+        return str(value[1])
     elif typ == "none":
         return "None"
     else:
@@ -19,5 +31,10 @@ def _strvalue(value):
 
 
 def print_(env, value):
-    env.stdout.write("%s\n" % _strvalue(value))
+    if value[0] == "string_builder":
+        for part in value[1].parts():
+            env.stdout.write(part)
+        env.stdout.write("\n")
+    else:
+        env.stdout.write("%s\n" % _strvalue(value))
     return ("none",)
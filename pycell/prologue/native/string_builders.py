@@ -0,0 +1,29 @@
+from pycell.string_builder import StringBuilder
+
+
+def _check_builder(fn_name, sb):
+    if sb[0] != "string_builder":
+        raise Exception(
+            "%s() must be given a string builder, but was given: %s" % (
+                fn_name, str(sb))
+        )
+
+
+def sb_new(env):
+    return ("string_builder", StringBuilder())
+
+
+def sb_append(env, sb, s):
+    _check_builder("sb_append", sb)
+    if s[0] == "string":
+        return ("string_builder", sb[1].append(s[1]))
+    elif s[0] == "string_builder":
+        return ("string_builder", sb[1].append(str(s[1])))
+    else:
+        raise Exception(
+            "sb_append() can only append a string, not '%s'." % str(s))
+
+
+def sb_str(env, sb):
+    _check_builder("sb_str", sb)
+    return ("string", str(sb[1]))
@@ -0,0 +1,92 @@
+import re
+
+from pycell.prologue.native.pairs import items_of
+from pycell.prologue.native.print_ import _strvalue
+
+
+_number_re = re.compile(r"^\s*-?([0-9]+\.?[0-9]*|\.[0-9]+)\s*$")
+
+
+def _check_string(fn_name, s):
+    if s[0] != "string":
+        raise Exception(
+            "%s() must be given a string, but was given: %s" % (
+                fn_name, str(s))
+        )
+    return s[1]
+
+
+def _check_number(fn_name, num):
+    if num[0] != "number":
+        raise Exception(
+            "%s() must be given a number, but was given: %s" % (
+                fn_name, str(num))
+        )
+    return int(num[1])
+
+
+def chars_in(env, s):
+    """
+    A sequence of the characters in s, for use with first, second and for.
+    """
+    if len(_check_string("chars_in", s)) == 0:
+        return ("none",)
+    else:
+        return ("string_seq", s[1], 0)
+
+
+def substring(env, s, start, end):
+    string = _check_string("substring", s)
+    st = min(max(_check_number("substring", start), 0), len(string))
+    en = min(max(_check_number("substring", end), st), len(string))
+    return ("string", string[st:en])
+
+
+def find(env, haystack, needle):
+    i = _check_string("find", haystack).find(_check_string("find", needle))
+    return ("none",) if i == -1 else ("number", i)
+
+
+def split(env, s, sep):
+    string = _check_string("split", s)
+    separator = _check_string("split", sep)
+    if separator == "":
+        raise Exception("split() can't split on an empty string.")
+    ret = ("none",)
+    for piece in reversed(string.split(separator)):
+        ret = ("pair", ("string", piece), ret)
+    return ret
+
+
+def join(env, lst, sep):
+    separator = _check_string("join", sep)
+    return (
+        "string",
+        separator.join(
+            _check_string("join", item) for item in items_of("join", lst)
+        )
+    )
+
+
+def starts_with(env, s, prefix):
+    string = _check_string("starts_with", s)
+    return (
+        "number",
+        1 if string.startswith(_check_string("starts_with", prefix)) else 0
+    )
+
+
+def to_number(env, s):
+    if s[0] == "number":
+        return s
+    elif _number_re.match(_check_string("to_number", s)):
+        return ("number", float(s[1]))
+    else:
+        return ("none",)
+
+
+def to_string(env, value):
+    if value[0] == "string":
+        return value
+    else:
+        return ("string", _strvalue(value))
@@ -0,0 +1,59 @@
+from pycell.vector import Vector
+
+
+def _check_vector(fn_name, v):
+    if v[0] != "vector":
+        raise Exception(
+            "%s() must be given a vector, but was given: %s" % (fn_name, str(v))
+        )
+
+
+def _check_number(fn_name, num):
+    if num[0] != "number":
+        raise Exception(
+            "%s() must be given a number, but was given: %s" % (
+                fn_name, str(num))
+        )
+    return int(num[1])
+
+
+def vec(env, *items):
+    return ("vector", Vector.of(items))
+
+
+def push(env, v, item):
+    _check_vector("push", v)
+    return ("vector", v[1].push(item))
+
+
+def nth(env, v, num):
+    _check_vector("nth", v)
+    n = _check_number("nth", num)
+    if n < 0 or n >= v[1].count:
+        return ("none",)
+    else:
+        return v[1].nth(n)
+
+
+def vlen(env, v):
+    _check_vector("vlen", v)
+    return ("number", float(v[1].count))
+
+
+def vslice(env, v, start, end):
+    _check_vector("vslice", v)
+    count = v[1].count
+    s = min(max(_check_number("vslice", start), 0), count)
+    e = min(max(_check_number("vslice", end), s), count)
+    return ("vector", v[1].slice(s, e))
+
+
+def vseq(env, v):
+    """
+    A sequence of the items in v, for use with first, second and for.
+    """
+    _check_vector("vseq", v)
+    if v[1].count == 0:
+        return ("none",)
+    else:
+        return ("vector_seq", v[1], 0)
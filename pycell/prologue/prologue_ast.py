@@ -0,0 +1,55 @@
+# Generated by pycell/prologue/build.py from the code in pycell/prologue/cell.
+# Do not edit.
+
+exprs = [('assignment',
+  ('symbol', 'not'),
+  ('function',
+   [('symbol', 'value')],
+   [('call',
+     ('symbol', 'if'),
+     [('symbol', 'value'),
+      ('function', [], [('constant', ('number', 0.0))]),
+      ('function', [], [('constant', ('number', 1.0))])])])),
+ ('assignment', ('symbol', 'prepend'), ('symbol', 'pair')),
+ ('assignment',
+  ('symbol', 'append'),
+  ('function',
+   [('symbol', 'lst'), ('symbol', 'item')],
+   [('call',
+     ('symbol', 'if'),
+     [('call',
+       ('symbol', 'equals'),
+       [('symbol', 'lst'), ('symbol', 'None')]),
+      ('function',
+       [],
+       [('call', ('symbol', 'list1'), [('symbol', 'item')])]),
+      ('function',
+       [],
+       [('call',
+         ('symbol', 'pair'),
+         [('call', ('symbol', 'first'), [('symbol', 'lst')]),
+          ('call',
+           ('symbol', 'append'),
+           [('call', ('symbol', 'second'), [('symbol', 'lst')]),
+            ('symbol', 'item')])])])])])),
+ ('assignment',
+  ('symbol', 'for'),
+  ('function',
+   [('symbol', 'xs'), ('symbol', 'fn')],
+   [('call',
+     ('symbol', 'if'),
+     [('call',
+       ('symbol', 'not'),
+       [('call',
+         ('symbol', 'equals'),
+         [('symbol', 'xs'), ('symbol', 'None')])]),
+      ('function',
+       [],
+       [('call',
+         ('symbol', 'fn'),
+         [('call', ('symbol', 'first'), [('symbol', 'xs')])]),
+        ('call',
+         ('symbol', 'for'),
+         [('call', ('symbol', 'second'), [('symbol', 'xs')]),
+          ('symbol', 'fn')])]),
+      ('function', [], [])])]))]
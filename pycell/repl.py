@@ -3,7 +3,7 @@ import pycell.library
 
 from pycell.chars_in_file import chars_in_file
 from pycell.env import Env
-from pycell.eval_ import eval_iter
+from pycell.engines import engine as find_engine
 from pycell.lexer import lex
 from pycell.parser import parse
 
@@ -21,6 +21,18 @@ def stringify(value):
         return "<function>"
     elif typ == "native":
         return "<native function>"
+    elif typ == "pair":
+        return "<pair>"
+    elif typ == "vector":
+        return "<vector>"
+    elif typ == "vector_seq":
+        return "<sequence>"
+    elif typ == "string_seq":
+        return "<sequence>"
+    elif typ == "map":
+        return "<map>"
+    elif typ == "string_builder":
+        return "<string builder %s>" % repr(str(value[1]))
     elif typ == "none":
         return "None"
     else:
@@ -53,9 +65,10 @@ class Prompt:
         self.values_queue.append(value)
 
 
-def repl(stdin, stdout, stderr):
+def repl(stdin, stdout, stderr, engine="tree"):
     env = Env(parent=None, stdin=stdin, stdout=stdout, stderr=stderr)
-    pycell.library.import_(env)
+    pycell.library.import_(env, engine)
+    eval_iter = find_engine(engine).eval_iter
     while True:
         try:
             p = Prompt(stdout)
@@ -0,0 +1,203 @@
+"""
+Works out, before a program runs, where each symbol it uses will be found.
+
+Symbols and assignments are annotated with a frame depth and a slot, so
+that they can be looked up by position in a Frame instead of by name:
+
+    ("symbol", name, depth, slot)
+
+depth is how many frames up from the current one to look, and slot is the
+position within that frame.  If slot is None, the symbol lives in the
+top-level Env, depth frames up, and is found by name.  If depth is also
+None, nothing is known about where it lives, and it is looked up by name at
+runtime.
+
+Symbols that can't possibly be found become ("unknown", name).
+
+Function definitions are annotated with their Scope, and keep their
+original body, so that values made from them still work in eval_.py:
+
+    ("function", params, resolved_body, scope, original_body)
+
+Calls keep their original function expression, for error messages:
+
+    ("call", resolved_fn, resolved_args, original_fn)
+"""
+
+
+class Scope:
+    """
+    The names that are local to one function: its parameters first, then
+    everything assigned directly in its body, in order.
+    """
+
+    def __init__(self, params, body):
+        self.names = []
+        self.index = {}
+        for p in params:
+            self._add(p[1])
+        self.num_params = len(params)
+        for name in assigned_names(body):
+            self._add(name)
+
+    def _add(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+
+
+def assigned_names(exprs):
+    """
+    The names assigned directly in exprs, not counting those assigned
+    inside function definitions.
+    """
+    ret = []
+    stack = list(reversed(exprs))
+    while len(stack) > 0:
+        expr = stack.pop()
+        typ = expr[0]
+        if typ == "assignment":
+            ret.append(expr[1][1])
+            stack.append(expr[2])
+        elif typ == "operation":
+            stack.append(expr[3])
+            stack.append(expr[2])
+        elif typ == "call":
+            stack.extend(reversed(expr[2]))
+            stack.append(expr[1])
+    return ret
+
+
+class _Resolver:
+    def __init__(self, is_global):
+        """
+        is_global(name) says whether name is known to be defined in the
+        top-level Env.  If it is None, the top level is not known, so
+        symbols not found in any enclosing Scope are looked up at runtime.
+        """
+        self.is_global = is_global
+
+    def expr(self, expr, scopes):
+        """
+        Resolve expr, working through it with explicit stacks instead of
+        recursing, so that however deeply it nests it uses no more of the
+        Python stack.  todo holds the expressions still to resolve, each
+        with whether its parts are resolved already, and done holds the
+        resolved parts until the expression they belong to takes them.
+        """
+        todo = [(expr, scopes, False)]
+        done = []
+        while len(todo) > 0:
+            expr, scopes, parts_done = todo.pop()
+            typ = expr[0]
+            if parts_done:
+                done.append(self.combine(expr, scopes, done))
+            elif typ == "symbol":
+                done.append(self.symbol(expr[1], scopes))
+            elif typ == "assignment":
+                todo.append((expr, scopes, True))
+                todo.append((expr[2], scopes, False))
+            elif typ == "operation":
+                todo.append((expr, scopes, True))
+                todo.append((expr[3], scopes, False))
+                todo.append((expr[2], scopes, False))
+            elif typ == "call":
+                todo.append((expr, scopes, True))
+                for arg in reversed(expr[2]):
+                    todo.append((arg, scopes, False))
+                todo.append((expr[1], scopes, False))
+            elif typ == "function":
+                inner = [Scope(expr[1], expr[2])] + scopes
+                todo.append((expr, inner, True))
+                for e in reversed(expr[2]):
+                    todo.append((e, inner, False))
+            else:
+                done.append(expr)
+        return done[0]
+
+    def combine(self, expr, scopes, done):
+        """
+        The resolved version of expr, taking its resolved parts off the end
+        of done.  For a function, scopes starts with its own Scope.
+        """
+        typ = expr[0]
+        if typ == "assignment":
+            return ("assignment", self.target(expr[1][1], scopes), done.pop())
+        elif typ == "operation":
+            arg2 = done.pop()
+            arg1 = done.pop()
+            return ("operation", expr[1], arg1, arg2)
+        elif typ == "call":
+            start = len(done) - len(expr[2])
+            args = done[start:]
+            del done[start:]
+            return ("call", done.pop(), args, expr[1])
+        else:  # function
+            start = len(done) - len(expr[2])
+            body = done[start:]
+            del done[start:]
+            return ("function", expr[1], body, scopes[0], expr[2])
+
+    def function(self, params, body, scopes):
+        return self.expr(("function", params, body), scopes)
+
+    def symbol(self, name, scopes):
+        for depth, scope in enumerate(scopes):
+            slot = scope.index.get(name)
+            if slot is not None:
+                return ("symbol", name, depth, slot)
+        if self.is_global is None:
+            return ("symbol", name, None, None)
+        elif self.is_global(name):
+            return ("symbol", name, len(scopes), None)
+        else:
+            return ("unknown", name)
+
+    def target(self, name, scopes):
+        if len(scopes) == 0:
+            return ("symbol", name, 0, None)
+        else:
+            return ("symbol", name, 0, scopes[0].index[name])
+
+
+def is_if_form(expr):
+    """
+    Whether the resolved call expr is to if, by name, with both branches
+    written out as functions taking no arguments.  Engines may run such a
+    call as a special form, if if still means the native when it runs.
+    """
+    args = expr[2]
+    return (
+        expr[3] == ("symbol", "if") and
+        len(args) == 3 and
+        args[1][0] == "function" and len(args[1][1]) == 0 and
+        args[2][0] == "function" and len(args[2][1]) == 0
+    )
+
+
+def resolve(exprs, env, closed=True):
+    """
+    Resolve top-level expressions that will be evaluated in env.
+
+    If closed is True, exprs is the whole of the program that will run in
+    env, so any symbol not defined in env or assigned at the top level of
+    exprs can never be found.  Otherwise, more code may be added later
+    (e.g. in the REPL) and such symbols are looked up by name at runtime.
+    """
+    if closed:
+        top_level = set(assigned_names(exprs))
+
+        def is_global(name):
+            return name in top_level or env.get(name) is not None
+        resolver = _Resolver(is_global)
+    else:
+        resolver = _Resolver(None)
+    return [resolver.expr(e, []) for e in exprs]
+
+
+def resolve_function(params, body):
+    """
+    Resolve a function definition whose surrounding code is unknown, so
+    anything not local to it is looked up by name at runtime.
+    """
+    return _Resolver(None).function(params, body, [])
@@ -1,14 +1,51 @@
 import pycell.library
+import pycell.prologue.prologue_ast
 
-from pycell.chars_in_file import chars_in_file
+from pycell.ast_cache import parse_file
 from pycell.env import Env
-from pycell.eval_ import eval_list
-from pycell.lexer import lex
-from pycell.parser import parse
+from pycell.engines import engine as find_engine
+from pycell.optimise import optimise as optimise_exprs
 
 
-def run(filename, stdin, stdout, stderr):
-    env = Env(stdin=stdin, stdout=stdout, stderr=stdout)
-    pycell.library.import_(env)
-    with open(filename, encoding="ascii") as f:
-        eval_list(parse(lex(chars_in_file(f))), env)
+def run(
+    filename, stdin, stdout, stderr, engine="tree", optimise=True, cache=True,
+    image=None, save_image=None, hooks=None
+):
+    """
+    Run the program in filename.  If image is given, it runs in the Env
+    loaded from that image instead of a fresh one.  If save_image is given,
+    the Env is saved there afterwards.  If hooks is given (a
+    pycell.hooks.Hooks, e.g. a pycell.profiler.Profiler), they watch the
+    program while it runs.
+
+    Only when there is no cache, no optimising and no hooks is the program
+    parsed as it runs, so that (on the tree engine) it runs up to a syntax
+    error.  Otherwise the whole file is parsed first.
+    """
+    if hooks is not None and engine != "tree":
+        raise Exception("Hooks only work with the tree engine.")
+    if image is None:
+        env = Env(stdin=stdin, stdout=stdout, stderr=stdout)
+        pycell.library.import_(env, engine)
+        fold_prologue = True
+    else:
+        from pycell.image import load_image
+        env = load_image(image, stdin, stdout, stdout)
+        fold_prologue = pycell.library.prologue_unchanged(env)
+    exprs = parse_file(filename, cache)
+    if optimise:
+        exprs = optimise_exprs(exprs, fold_prologue)
+    if hooks is None:
+        find_engine(engine).eval_list(exprs, env)
+    else:
+        exprs = list(exprs)
+        hooks.name_functions(pycell.prologue.prologue_ast.exprs)
+        hooks.name_functions(exprs)
+        hooks.start()
+        try:
+            find_engine(engine).eval_list(exprs, env)
+        finally:
+            hooks.stop()
+    if save_image is not None:
+        from pycell.image import save_image as save
+        save(save_image, env)
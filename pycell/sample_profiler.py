@@ -0,0 +1,78 @@
+"""
+A sampling profiler for programs run by the tree engine, for
+--sample-profile.
+
+It is a set of pycell.hooks.Hooks: while it is running, eval_ keeps it
+told of the Cell call stack (the names of the functions and natives
+currently running, as pycell.profiler names them), which costs only a list
+append and pop per call.  A thread looks at that stack every few
+milliseconds and counts how often it sees each one, so tiny functions are
+not slowed down by timing every call.
+
+write_folded writes the counts in the "collapsed stacks" format read by
+flamegraph tools: one line per stack, outermost function first, separated
+by semicolons, followed by the number of samples, e.g.
+
+    main;fib;fib 12
+"""
+
+import threading
+
+from pycell.hooks import Hooks
+from pycell.profiler import FunctionNames
+
+
+class SampleProfiler(Hooks):
+
+    def __init__(self, interval=0.005):
+        self.interval = interval  # Seconds between samples
+        self.samples = {}   # tuple of names, outermost first -> count
+        self.names = FunctionNames()
+        self.stack = []
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def name_functions(self, exprs):
+        self.names.add(exprs)
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        Hooks.start(self)
+
+    def stop(self):
+        Hooks.stop(self)
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """
+        Count the stack as it is right now.  Called from the sampling
+        thread, while the program changes the stack: copying it is a single
+        step, so the copy is always a stack that really happened.
+        """
+        stack = tuple(self.stack)
+        if len(stack) > 0:
+            self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def enter_function(self, fn, args):
+        self.stack.append(self.names.function(fn[2]))
+
+    def enter_native(self, fn, args):
+        self.stack.append(self.names.native(fn[1]))
+
+    def exit_function(self, fn, value):
+        self.stack.pop()
+
+    def exit_native(self, fn, value):
+        self.stack.pop()
+
+    def write_folded(self, out):
+        for stack, count in sorted(self.samples.items()):
+            out.write("%s %d\n" % (";".join(stack), count))
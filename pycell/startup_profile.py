@@ -0,0 +1,87 @@
+"""
+Times each module imported while cell starts up, for --startup-profile.
+
+This works like python -X importtime, but can be switched on from inside
+the program: it puts a finder at the front of sys.meta_path that wraps the
+loader of every module found, timing how long the module takes to run.
+"""
+
+import sys
+import time
+
+
+class _TimingLoader:
+    def __init__(self, loader, profile):
+        self.loader = loader
+        self.profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profile.exec_module(self.loader, module)
+
+
+class ImportProfile:
+
+    def __init__(self):
+        self.imports = []   # (depth, name, self time, cumulative time)
+        self._children = []  # Time spent in nested imports, per level
+        self.start_time = None
+        self.stop_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        sys.meta_path.insert(0, self)
+
+    def stop(self):
+        self.stop_time = time.perf_counter()
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self)
+                return spec
+        return None
+
+    def exec_module(self, loader, module):
+        depth = len(self._children)
+        index = len(self.imports)
+        self.imports.append(None)
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = self._children.pop()
+            if len(self._children) > 0:
+                self._children[-1] += cumulative
+            self.imports[index] = (
+                depth, module.__name__, cumulative - children, cumulative)
+
+    def report(self, out):
+        out.write("Startup profile: import times in ms\n")
+        out.write("    self  cumulative  module\n")
+        total = 0.0
+        for depth, name, self_time, cumulative in self.imports:
+            if depth == 0:
+                total += cumulative
+            out.write(
+                "%8.2f %11.2f  %s%s\n" % (
+                    self_time * 1000, cumulative * 1000, "  " * depth, name)
+            )
+        out.write("Imports: %.2fms\n" % (total * 1000))
+        out.write(
+            "Total (including running): %.2fms\n" % (
+                (self.stop_time - self.start_time) * 1000)
+        )
@@ -0,0 +1,106 @@
+"""
+Counts what a program run by the tree engine creates and does, for
+--stats: how many Envs and function values it makes, how many calls it
+makes and how deeply they nest, the most memory it had allocated at once
+(as traced by tracemalloc), and how many times Python's garbage collector
+ran.
+
+Tracing memory slows the program down a lot, so times measured while
+collecting stats mean little.
+"""
+
+import gc
+import tracemalloc
+
+from pycell.env import Env
+from pycell.hooks import Hooks
+
+
+class Stats(Hooks):
+
+    def __init__(self):
+        self.envs = 0
+        self.functions = 0
+        self.function_calls = 0
+        self.native_calls = 0
+        self.max_depth = 0
+        self.peak_memory = None     # Bytes
+        self.gc_collections = None  # Collections of each generation
+        self._depth = 0
+        self._env_init = None
+        self._gc_before = None
+        self._tracing = False
+
+    def start(self):
+        # Envs are made in many places, in every engine, so count them by
+        # wrapping Env's constructor while the program runs.
+        env_init = Env.__init__
+        self._env_init = env_init
+
+        def counting_init(env, *args, **kwargs):
+            self.envs += 1
+            env_init(env, *args, **kwargs)
+
+        Env.__init__ = counting_init
+        self._gc_before = [s["collections"] for s in gc.get_stats()]
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        Hooks.start(self)
+
+    def stop(self):
+        Hooks.stop(self)
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._tracing:
+            tracemalloc.stop()
+        self.gc_collections = [
+            s["collections"] - before
+            for s, before in zip(gc.get_stats(), self._gc_before)
+        ]
+        Env.__init__ = self._env_init
+
+    def make_function(self, fn):
+        self.functions += 1
+
+    def enter_function(self, fn, args):
+        self.function_calls += 1
+        self._enter()
+
+    def enter_native(self, fn, args):
+        self.native_calls += 1
+        self._enter()
+
+    def _enter(self):
+        self._depth += 1
+        if self._depth > self.max_depth:
+            self.max_depth = self._depth
+
+    def exit_function(self, fn, value):
+        self._depth -= 1
+
+    def exit_native(self, fn, value):
+        self._depth -= 1
+
+    def report(self, out):
+        if self.peak_memory is None:
+            out.write("Stats: none, because the program did not run.\n")
+            return
+        out.write("Stats:\n")
+        out.write("%10d environments created\n" % self.envs)
+        out.write("%10d function values created\n" % self.functions)
+        out.write("%10d function calls\n" % self.function_calls)
+        out.write("%10d native calls\n" % self.native_calls)
+        out.write(
+            "%10d maximum call depth (functions and natives)\n"
+            % self.max_depth
+        )
+        out.write(
+            "%10.1f KiB peak traced memory\n" % (self.peak_memory / 1024))
+        out.write(
+            "%10s GC collections (generation %s)\n" % (
+                "/".join(str(n) for n in self.gc_collections),
+                "/".join(str(i) for i in range(len(self.gc_collections))),
+            )
+        )
@@ -0,0 +1,63 @@
+"""
+A string made by appending pieces, which keeps the pieces instead of
+copying them into one Python string each time.
+
+Builders are immutable, but share their list of pieces: appending to the
+newest builder made from a list just adds to the end of that list, and only
+appending to an older one needs a copy.  This makes building a string with
+n appends take O(n) time, instead of the O(n^2) of repeated concatenation.
+"""
+
+from bisect import bisect_right
+from itertools import islice
+
+
+class StringBuilder:
+
+    __slots__ = ("_parts", "_ends", "_count", "length")
+
+    def __init__(self, parts=None, ends=None, count=0):
+        self._parts = [] if parts is None else parts
+        self._ends = [] if ends is None else ends
+        self._count = count
+        self.length = ends[count - 1] if count > 0 else 0
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return "".join(self.parts())
+
+    def __eq__(self, other):
+        return isinstance(other, StringBuilder) and str(self) == str(other)
+
+    def __repr__(self):
+        return "StringBuilder(%s)" % repr(str(self))
+
+    def parts(self):
+        return islice(self._parts, self._count)
+
+    def append(self, s):
+        """
+        A new builder with s added to the end.
+        """
+        if len(s) == 0:
+            return self
+        count = self._count
+        if len(self._parts) == count:
+            parts = self._parts
+            ends = self._ends
+        else:
+            parts = self._parts[:count]
+            ends = self._ends[:count]
+        parts.append(s)
+        ends.append(self.length + len(s))
+        return StringBuilder(parts, ends, count + 1)
+
+    def char_at(self, i):
+        """
+        The character at index i, which must be in range.
+        """
+        k = bisect_right(self._ends, i, 0, self._count)
+        start = self._ends[k - 1] if k > 0 else 0
+        return self._parts[k][i - start]
@@ -0,0 +1,12 @@
+class TailCall:
+    """
+    A native may return one of these instead of a value, to ask the
+    evaluator to make the call in expr for it.  Because the evaluator makes
+    the call after the native has returned, it does not use up any more of
+    the Python stack.
+    """
+    __slots__ = ("expr", "env")
+
+    def __init__(self, expr, env):
+        self.expr = expr
+        self.env = env
@@ -0,0 +1,81 @@
+"""
+Hooks that write everything the tree engine does to a stream as JSON
+lines, for --trace.  Each line is one event, e.g.
+
+    {"event": "enter", "function": "fib", "args": [3], "depth": 1}
+    {"event": "exit", "function": "fib", "value": 2, "depth": 1}
+    {"event": "assign", "name": "x", "value": "hello", "depth": 0}
+
+event is the name of the hook (see pycell.hooks) without its "_function".
+Functions and natives are named as pycell.profiler names them, and depth
+is the number of functions and natives running when the event happened.
+
+Numbers, strings and None are written as JSON values; any other Cell value
+is written as an object giving its type, e.g. {"type": "pair"}.  An exit
+without a value (after a tail call, or an exception) has no "value".
+"""
+
+import json
+
+from pycell.hooks import Hooks
+from pycell.profiler import FunctionNames
+
+
+def _json_value(value):
+    typ = value[0]
+    if typ == "number" or typ == "string":
+        return value[1]
+    elif typ == "none":
+        return None
+    else:
+        return {"type": typ}
+
+
+class JsonTrace(Hooks):
+
+    def __init__(self, out):
+        self.out = out
+        self.names = FunctionNames()
+        self.depth = 0
+
+    def name_functions(self, exprs):
+        self.names.add(exprs)
+
+    def _write(self, event):
+        event["depth"] = self.depth
+        self.out.write(json.dumps(event) + "\n")
+
+    def enter_function(self, fn, args):
+        self._enter("enter", self.names.function(fn[2]), args)
+
+    def exit_function(self, fn, value):
+        self._exit("exit", self.names.function(fn[2]), value)
+
+    def enter_native(self, fn, args):
+        self._enter("enter_native", self.names.native(fn[1]), args)
+
+    def exit_native(self, fn, value):
+        self._exit("exit_native", self.names.native(fn[1]), value)
+
+    def _enter(self, event, name, args):
+        self._write({
+            "event": event,
+            "function": name,
+            "args": [_json_value(a) for a in args],
+        })
+        self.depth += 1
+
+    def _exit(self, event, name, value):
+        self.depth -= 1
+        event = {"event": event, "function": name}
+        if value is not None:
+            event["value"] = _json_value(value)
+        self._write(event)
+
+    def assign(self, name, value, env):
+        self._write(
+            {"event": "assign", "name": name, "value": _json_value(value)})
+
+    def set(self, name, value, env):
+        self._write(
+            {"event": "set", "name": name, "value": _json_value(value)})
@@ -0,0 +1,109 @@
+"""
+An immutable vector, stored as a tree with 32 items in each node, plus a
+"tail" node holding the last few items (the same shape as Clojure's
+vector).  Pushing and indexing only touch one path down the tree, so they
+take O(log32 n) time, and the new vector shares everything else with the
+old one.
+"""
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+
+def _new_path(level, node):
+    while level > 0:
+        node = (node,)
+        level -= _BITS
+    return node
+
+
+class Vector:
+
+    __slots__ = ("count", "_shift", "_root", "_tail")
+
+    def __init__(self, count=0, shift=_BITS, root=(), tail=()):
+        self.count = count
+        self._shift = shift
+        self._root = root
+        self._tail = tail
+
+    @staticmethod
+    def of(items):
+        ret = Vector()
+        for item in items:
+            ret = ret.push(item)
+        return ret
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        if not isinstance(other, Vector) or other.count != self.count:
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+    def __iter__(self):
+        tail_offset = self._tail_offset()
+        for i in range(0, tail_offset, _WIDTH):
+            yield from self._leaf_for(i)
+        yield from self._tail
+
+    def __repr__(self):
+        return "Vector(%s)" % repr(list(self))
+
+    def _tail_offset(self):
+        if self.count < _WIDTH:
+            return 0
+        return ((self.count - 1) >> _BITS) << _BITS
+
+    def _leaf_for(self, i):
+        if i >= self._tail_offset():
+            return self._tail
+        node = self._root
+        level = self._shift
+        while level > 0:
+            node = node[(i >> level) & _MASK]
+            level -= _BITS
+        return node
+
+    def nth(self, i):
+        """
+        The item at index i, which must be in range.
+        """
+        return self._leaf_for(i)[i & _MASK]
+
+    def push(self, item):
+        """
+        A new vector with item added at the end.
+        """
+        count = self.count
+        if count - self._tail_offset() < _WIDTH:
+            return Vector(
+                count + 1, self._shift, self._root, self._tail + (item,))
+        shift = self._shift
+        if (count >> _BITS) > (1 << shift):
+            root = (self._root, _new_path(shift, self._tail))
+            shift += _BITS
+        else:
+            root = self._push_tail(shift, self._root, self._tail)
+        return Vector(count + 1, shift, root, (item,))
+
+    def _push_tail(self, level, parent, tail):
+        sub_index = ((self.count - 1) >> level) & _MASK
+        if level == _BITS:
+            to_insert = tail
+        elif sub_index < len(parent):
+            to_insert = self._push_tail(level - _BITS, parent[sub_index], tail)
+        else:
+            to_insert = _new_path(level - _BITS, tail)
+        return parent[:sub_index] + (to_insert,) + parent[sub_index + 1:]
+
+    def slice(self, start, end):
+        """
+        A new vector holding the items from start up to (not including) end.
+        """
+        ret = Vector()
+        for i in range(start, end):
+            ret = ret.push(self.nth(i))
+        return ret
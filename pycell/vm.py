@@ -0,0 +1,250 @@
+"""
+A stack-based virtual machine that runs the bytecode made by bytecode.py.
+
+Cell frames live on a list here instead of on the Python stack, so deeply
+recursive Cell programs are not limited by Python's recursion limit.  Nor
+are deeply nested expressions, since the parser, optimiser, resolver and
+bytecode compiler don't recurse either.
+
+Before compiling, the resolver works out where each symbol lives, so that
+inside functions symbols are found by position in a Frame, as in
+closures.py.  Top-level code still runs in the Env it is given.
+
+Values are the same as in eval_.py, so natives work unchanged.  Function
+values made here carry their Code as a fifth element.
+"""
+
+from pycell.bytecode import (
+    ADD,
+    BAD_OPERATION,
+    CALL,
+    CHECK_NEW,
+    CHECK_NEW_LOCAL,
+    CONST,
+    DIVIDE,
+    IF_NATIVE,
+    JUMP,
+    JUMP_IF_FALSE,
+    LOAD_GLOBAL,
+    LOAD_LOCAL,
+    LOAD_NAME,
+    LOAD_OUTER,
+    LOAD_TOP,
+    MAKE_FUNCTION,
+    MULTIPLY,
+    POP,
+    RETURN,
+    STORE,
+    STORE_LOCAL,
+    SUBTRACT,
+    UNKNOWN,
+    compile_expr,
+    compile_function,
+)
+from pycell.eval_ import (
+    eval_expr,
+    fail_if_wrong_number_of_args,
+    fail_if_wrong_number_of_native_args,
+    native_arity,
+)
+from pycell.frame import Frame
+from pycell.prologue.native.if_ import if_
+from pycell.resolver import resolve, resolve_function
+
+
+_body_codes = {}
+
+
+def _body_code(fn):
+    """
+    The Code for a function value.  Values made by this VM carry it with
+    them, but others (e.g. made by natives, or loaded from an image) are
+    resolved and compiled on first use.
+    """
+    if len(fn) > 4 and fn[4] is not None:
+        return fn[4]
+    body = fn[2]
+    cached = _body_codes.get(id(body))
+    if cached is None or cached[0] is not body:
+        cached = (body, compile_function(resolve_function(fn[1], body)))
+        _body_codes[id(body)] = cached
+    return cached[1]
+
+
+def _by_name(env, name):
+    ret = env.get(name)
+    if ret is None:
+        raise Exception("Unknown symbol '%s'." % name)
+    return ret
+
+
+def _check_if_condition(t):
+    if t[0] != "number":
+        raise Exception(
+            (
+                "Only numbers may be passed to an if, but I was passed '%s'"
+            ) % str(t)
+        )
+
+
+def execute(code, env):
+    """
+    Run code in env until it returns, and give back its value.
+    """
+    ops = code.ops
+    consts = code.consts
+    pc = 0
+    stack = []
+    frames = []
+    while True:
+        op = ops[pc]
+        arg = ops[pc + 1]
+        pc += 2
+        if op == LOAD_GLOBAL:
+            name = consts[arg]
+            ret = env.root.items.get(name)
+            if ret is None:
+                ret = _by_name(env, name)
+            stack.append(ret)
+        elif op == LOAD_LOCAL:
+            ret = env.slots[arg]
+            if ret is None:
+                # Not assigned yet here, so it means the one outside
+                ret = _by_name(env.parent, env.scope.names[arg])
+            stack.append(ret)
+        elif op == CONST:
+            stack.append(consts[arg])
+        elif op == CALL:
+            fn_expr, num_args = consts[arg]
+            if num_args > 0:
+                args = stack[-num_args:]
+                del stack[-num_args:]
+            else:
+                args = []
+            fn = stack.pop()
+            typ = fn[0]
+            if typ == "native":
+                py_fn = fn[1]
+                arity = fn[2] if len(fn) > 2 else native_arity(fn)
+                if arity is not None and arity != num_args:
+                    fail_if_wrong_number_of_native_args(fn_expr, arity, args)
+                if py_fn is not if_:
+                    stack.append(py_fn(env, *args))
+                    continue
+                _check_if_condition(args[0])
+                fn = args[1] if args[0][1] != 0 else args[2]
+                if fn[0] != "function":
+                    stack.append(
+                        eval_expr(("call", ("constant", fn), []), env))
+                    continue
+                fn_expr = fn[:4]
+                args = []
+            elif typ != "function":
+                raise Exception(
+                    "Attempted to call something that is not a function: %s"
+                    % str(fn)
+                )
+            if len(fn[1]) != len(args):
+                fail_if_wrong_number_of_args(fn_expr, fn[1], args)
+            fn_code = fn[4] if len(fn) > 4 else None
+            if fn_code is None:
+                fn_code = _body_code(fn)
+            frames.append((ops, consts, pc, env))
+            env = Frame(fn_code.scope, fn[3])
+            env.slots[:len(args)] = args
+            ops = fn_code.ops
+            consts = fn_code.consts
+            pc = 0
+        elif op == RETURN:
+            if len(frames) == 0:
+                return stack.pop()
+            ops, consts, pc, env = frames.pop()
+        elif op == IF_NATIVE:
+            fn = stack[-2]
+            if fn[0] == "native" and fn[1] is if_:
+                del stack[-2]
+            else:
+                pc = arg
+        elif op == JUMP_IF_FALSE:
+            t = stack.pop()
+            _check_if_condition(t)
+            if t[1] == 0:
+                pc = arg
+        elif op == JUMP:
+            pc = arg
+        elif op == ADD:
+            arg2 = stack.pop()
+            stack[-1] = ("number", stack[-1][1] + arg2[1])
+        elif op == SUBTRACT:
+            arg2 = stack.pop()
+            stack[-1] = ("number", stack[-1][1] - arg2[1])
+        elif op == MULTIPLY:
+            arg2 = stack.pop()
+            stack[-1] = ("number", stack[-1][1] * arg2[1])
+        elif op == DIVIDE:
+            arg2 = stack.pop()
+            stack[-1] = ("number", stack[-1][1] / arg2[1])
+        elif op == LOAD_OUTER:
+            depth, slot = consts[arg]
+            frame = env
+            for _ in range(depth):
+                frame = frame.parent
+            ret = frame.slots[slot]
+            if ret is None:
+                ret = _by_name(frame.parent, frame.scope.names[slot])
+            stack.append(ret)
+        elif op == LOAD_TOP:
+            name = consts[arg]
+            ret = env.items.get(name)
+            if ret is None:
+                ret = _by_name(env, name)
+            stack.append(ret)
+        elif op == LOAD_NAME:
+            stack.append(_by_name(env, consts[arg]))
+        elif op == POP:
+            stack.pop()
+        elif op == MAKE_FUNCTION:
+            params, body, fn_code = consts[arg]
+            stack.append(("function", params, body, env, fn_code))
+        elif op == CHECK_NEW_LOCAL:
+            if env.slots[arg] is not None:
+                raise Exception(
+                    "Not allowed to re-assign symbol '%s'." %
+                    env.scope.names[arg]
+                )
+        elif op == STORE_LOCAL:
+            env.slots[arg] = stack[-1]
+        elif op == CHECK_NEW:
+            name = consts[arg]
+            if name in env.items:
+                raise Exception(
+                    "Not allowed to re-assign symbol '%s'." % name)
+        elif op == STORE:
+            env.items[consts[arg]] = stack[-1]
+        elif op == UNKNOWN:
+            raise Exception("Unknown symbol '%s'." % consts[arg])
+        elif op == BAD_OPERATION:
+            del stack[-2:]
+            raise Exception("Unknown operation: " + consts[arg])
+        else:
+            raise Exception("Unknown opcode: %d" % op)
+
+
+def eval_iter(exprs, env):
+    """
+    Evaluate each expression as it arrives, so symbols defined by later
+    expressions are looked up by name.
+    """
+    for expr in exprs:
+        yield execute(
+            compile_expr(resolve([expr], env, closed=False)[0]), env)
+
+
+def eval_list(exprs, env):
+    """
+    Evaluate a whole program, resolving it all first.
+    """
+    ret = ("none",)
+    for expr in resolve(list(exprs), env):
+        ret = execute(compile_expr(expr), env)
+    return ret
@@ -0,0 +1,117 @@
+import marshal
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from tests.util.asserts import assert_that, assert_fails, equals
+from tests.util.test import test
+
+from pycell.ast_cache import cache_path, parse_file
+from pycell.lexer import lex
+from pycell.parser import parse
+from pycell.run import run
+
+
+# --- Utils ---
+
+
+class TempProgram:
+    def __init__(self, source):
+        self.source = source
+
+    def __enter__(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, "prog.cell")
+        self.write(self.source)
+        return self
+
+    def __exit__(self, *args):
+        shutil.rmtree(self.dir)
+
+    def write(self, source):
+        with open(self.filename, "w") as f:
+            f.write(source)
+
+
+# --- Tests ---
+
+
+@test
+def Parsing_a_file_writes_the_cache():
+    with TempProgram("x = 3; print(x);") as prog:
+        assert_that(
+            parse_file(prog.filename),
+            equals(list(parse(lex("x = 3; print(x);"))))
+        )
+        assert_that(os.path.isfile(cache_path(prog.filename)), equals(True))
+        assert_that(
+            parse_file(prog.filename),
+            equals(list(parse(lex("x = 3; print(x);"))))
+        )
+
+
+@test
+def The_cache_is_used_while_the_source_is_unchanged():
+    with TempProgram("1;") as prog:
+        parse_file(prog.filename)
+        with open(cache_path(prog.filename), "rb") as f:
+            version, digest, _ = marshal.load(f)
+        with open(cache_path(prog.filename), "wb") as f:
+            marshal.dump((version, digest, [("number", "2")]), f)
+        assert_that(parse_file(prog.filename), equals([("number", "2")]))
+
+
+@test
+def Changing_the_source_makes_the_cache_out_of_date():
+    with TempProgram("1;") as prog:
+        parse_file(prog.filename)
+        prog.write("2;")
+        assert_that(parse_file(prog.filename), equals([("number", "2")]))
+
+
+@test
+def A_damaged_cache_file_is_ignored():
+    with TempProgram("1;") as prog:
+        parse_file(prog.filename)
+        with open(cache_path(prog.filename), "wb") as f:
+            f.write(b"rubbish")
+        assert_that(parse_file(prog.filename), equals([("number", "1")]))
+
+
+@test
+def Files_with_any_kind_of_newline_parse_the_same_with_the_cache():
+    with TempProgram("") as prog:
+        for newline in (b"\r\n", b"\r"):
+            with open(prog.filename, "wb") as f:
+                f.write(b"x = 3;" + newline + b"print(x);" + newline)
+            assert_that(
+                parse_file(prog.filename),
+                equals(list(parse_file(prog.filename, cache=False)))
+            )
+            assert_that(
+                parse_file(prog.filename),
+                equals(list(parse(lex("x = 3;\nprint(x);\n"))))
+            )
+
+
+@test
+def Parsing_without_the_cache_writes_nothing():
+    with TempProgram("1;") as prog:
+        assert_that(
+            list(parse_file(prog.filename, cache=False)),
+            equals([("number", "1")])
+        )
+        assert_that(os.path.exists(cache_path(prog.filename)), equals(False))
+
+
+@test
+def Without_the_cache_or_optimising_a_program_runs_up_to_a_syntax_error():
+    with TempProgram('print("before");\nx = (;\n') as prog:
+        with StringIO() as stdin, StringIO() as stdout:
+            assert_fails(
+                "Unexpected token: (';', '')",
+                run,
+                prog.filename, stdin, stdout, stdout, "tree", False, False
+            )
+            assert_that(stdout.getvalue(), equals("before\n"))
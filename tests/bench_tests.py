@@ -0,0 +1,76 @@
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.engines import engine, engine_names
+from pycell.env import Env
+from pycell.lexer import lex
+from pycell.library import import_
+from pycell.parser import parse
+
+from bench.frontend import count_nodes, measure
+from bench.generate import generate, shape_names
+from bench.run import compare, workload_names, workload_source
+
+
+def results(engine, **medians):
+    return {
+        "engine": engine,
+        "workloads": {
+            name: {"median": median} for name, median in medians.items()
+        },
+    }
+
+
+@test
+def Workloads_more_than_threshold_slower_are_regressions():
+    out = StringIO()
+    regressions = compare(
+        results("tree", a=1.0, b=1.0, c=1.0),
+        results("tree", a=1.05, b=1.2, c=0.5, d=1.0),
+        0.1,
+        out
+    )
+    assert_that(regressions, equals(["b"]))
+    lines = out.getvalue().splitlines()
+    assert_that(lines[1].endswith("REGRESSION"), equals(True))
+    assert_that(lines[2].endswith("faster"), equals(True))
+    assert_that(lines[3], equals("d              (not in baseline)"))
+
+
+@test
+def The_incell_lexer_workload_includes_the_incell_lexer():
+    assert_that("incell_lexer" in workload_names(), equals(True))
+    source = workload_source("incell_lexer")
+    assert_that("\nlex =\n" in source, equals(True))
+    assert_that("--- Test Utils ---" in source, equals(False))
+
+
+@test
+def Generated_programs_depend_only_on_shape_size_and_seed():
+    for shape in shape_names():
+        assert_that(generate(shape, 20, 1), equals(generate(shape, 20, 1)))
+        assert_that(
+            generate(shape, 20, 1) == generate(shape, 20, 2), equals(False))
+
+
+@test
+def Generated_programs_run_on_every_engine():
+    for engine_name in engine_names():
+        eval_list = engine(engine_name).eval_list
+        for shape in shape_names():
+            for seed in range(3):
+                env = Env()
+                import_(env, engine_name)
+                eval_list(parse(lex(generate(shape, 100, seed))), env)
+
+
+@test
+def Frontend_measures_every_stage():
+    results = measure("x = 1 + f(2);", 1)
+    assert_that(sorted(results), equals(["compile", "lex", "parse"]))
+    assert_that(results["lex"]["tokens"], equals(9))
+    assert_that(results["parse"]["nodes"], equals(7))
+    assert_that(results["compile"]["nodes"], equals(7))
+    assert_that(count_nodes([("number", "1")]), equals(1))
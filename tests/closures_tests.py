@@ -0,0 +1,236 @@
+from io import StringIO
+
+from tests.util.asserts import assert_that, assert_fails, equals
+from tests.util.test import test
+from tests.util.system_test import system_test
+from tests.util.all_examples import all_examples
+
+from pycell.lexer import lex
+from pycell.parser import parse
+from pycell.closures import eval_list
+from pycell.env import Env
+
+import pycell.library
+
+# --- Utils ---
+
+def evald(inp, env=None):
+    if env is None:
+        env = Env()
+    return eval_list(parse(lex(inp)), env)
+
+
+def runned(inp, stdout=None):
+    env = Env(stdout=stdout)
+    pycell.library.import_(env, "closures")
+    return eval_list(parse(lex(inp)), env)
+
+
+def assert_prog_fails(program, error, env=None):
+    assert_fails(error, evald, program, env)
+
+
+# --- Evaluating ---
+
+
+@test
+def Evaluating_an_empty_program_gives_none():
+    assert_that(evald(""), equals(("none",)))
+
+
+@test
+def Evaluating_a_primitive_returns_itself():
+    assert_that(evald("3;"), equals(("number", 3)))
+    assert_that(evald("'foo';"), equals(("string", "foo")))
+
+
+@test
+def Arithmetic_expressions_come_out_correct():
+    assert_that(evald("3 + 4;"), equals(("number", 7)))
+    assert_that(evald("3 - 4;"), equals(("number", -1)))
+    assert_that(evald("3 * 4;"), equals(("number", 12)))
+    assert_that(evald("3 / 4;"), equals(("number", 0.75)))
+
+
+@test
+def Referring_to_an_unknown_symbol_is_an_error():
+    assert_prog_fails("x;", "Unknown symbol 'x'.")
+
+
+@test
+def Modifying_a_value_is_an_error():
+    assert_prog_fails("x = 30;x = 10;", "Not allowed to re-assign symbol 'x'.")
+
+
+@test
+def Body_of_a_function_can_use_arg_values():
+    assert_that(
+        evald("{:(x, y) x + y;}(100, 1);"),
+        equals(("number", 101))
+    )
+
+
+@test
+def A_symbol_has_different_life_inside_and_outside_a_function():
+    assert_that(
+        evald("""
+            foo = "bar";
+            {foo = 3;}();
+            foo;
+        """),
+        equals(("string", "bar"))
+    )
+
+
+@test
+def Wrong_number_of_arguments_to_a_function_is_an_error():
+    assert_prog_fails(
+        "x={:(a, b, c)}; x(3, 2);",
+        "2 arguments passed to function ('symbol', 'x'), but it requires 3 arguments."
+    )
+
+
+@test
+def Native_function_gets_called():
+    def native_fn(env, x, y):
+        return ("number", x[1] + y[1])
+    env = Env()
+    env.set("native_fn", ("native", native_fn))
+    assert_that(evald("native_fn( 2, 8 );", env), equals(("number", 10)))
+
+
+@test
+def Calling_a_nonfunction_is_an_error():
+    assert_prog_fails(
+        "3();",
+        "Attempted to call something that is not a function: ('number', 3.0)"
+    )
+    env = Env()
+    env.set("None", ("none",))
+    assert_prog_fails(
+        "x = None; x();",
+        "Attempted to call something that is not a function: ('none',)",
+        env
+    )
+
+
+@test
+def If_runs_the_chosen_branch():
+    assert_that(runned('if( 1, {"t";}, {"f";} );'), equals(("string", "t")))
+    assert_that(runned('if( 0, {"t";}, {"f";} );'), equals(("string", "f")))
+
+
+@test
+def If_with_a_nonnumber_is_an_error():
+    assert_fails(
+        "Only numbers may be passed to an if, but I was passed "
+        + "'('string', 'x')'",
+        runned,
+        'if("x", {}, {});'
+    )
+
+
+@test
+def Set_changes_value_of_symbol_in_outer_scope():
+    assert_that(
+        runned('foo = "bar"; fn = { set("foo", "baz"); }; fn(); foo;'),
+        equals(("string", "baz"))
+    )
+
+
+@test
+def Prologue_lists_work():
+    stdout = StringIO()
+    runned(
+        'for(append(list2("a", "b"), "c"), {:(ch) print(ch);});',
+        stdout=stdout
+    )
+    assert_that(stdout.getvalue(), equals("a\nb\nc\n"))
+
+
+@test
+def Tail_calls_do_not_use_up_the_python_stack():
+    assert_that(
+        runned(
+            """
+            build = {:(n, acc)
+                if(equals(n, 0), {acc;}, {build(n - 1, pair(n, acc));});
+            };
+            total = 0;
+            for(build(10000, None), {:(x) set("total", total + x);});
+            total;
+            """
+        ),
+        equals(("number", 50005000))
+    )
+
+
+@test
+def Tail_calls_through_if_as_a_value_do_not_use_up_the_python_stack():
+    assert_that(
+        runned(
+            """
+            choose = if;
+            count = {:(n) choose(equals(n, 0), {"done";}, {count(n - 1);});};
+            count(10000);
+            """
+        ),
+        equals(("string", "done"))
+    )
+
+
+@system_test
+def All_examples_evaluate():
+    from pycell.run import run
+    for example in all_examples():
+        with StringIO() as stdin, StringIO() as stdout:
+            run(example, stdin, stdout, stdout, engine="closures")
+            with open(example[:-5] + ".output.txt") as outputfile:
+                assert_that(stdout.getvalue(), equals(outputfile.read()))
+
+
+@test
+def A_local_is_the_outer_value_until_it_is_assigned():
+    assert_that(
+        evald("""
+            foo = "bar";
+            {
+                x = foo;
+                foo = 3;
+                x;
+            }();
+        """),
+        equals(("string", "bar"))
+    )
+
+
+@test
+def Closures_see_values_in_enclosing_frames():
+    assert_that(
+        evald("""
+            adder = {:(x) {:(y) {:(z) x + y + z;};};};
+            adder(1)(2)(3);
+        """),
+        equals(("number", 6))
+    )
+
+
+@test
+def Unknown_symbols_in_functions_fail_only_when_run():
+    assert_that(evald("f = {nosuchthing;}; 3;"), equals(("number", 3)))
+    assert_prog_fails("f = {nosuchthing;}; f();", "Unknown symbol 'nosuchthing'.")
+
+
+@test
+def Set_changes_a_local_held_in_a_frame():
+    assert_that(
+        runned("""
+            counter = {
+                x = 0;
+                {set("x", x + 1); x;};
+            }();
+            counter();
+            counter();
+        """),
+        equals(("number", 2))
+    )
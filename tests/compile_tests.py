@@ -182,6 +182,20 @@ for__();
     )
 
 
+@test
+def Compiling_if_with_branches_that_are_not_literals_calls_them():
+    assert_that(
+        compiled("if(1, t, {'false'});"),
+        equals("""(function() {
+    if( 1 !== 0 ) {
+        return (t)();
+    } else {
+        return 'false';
+    }
+})();\n""")
+    )
+
+
 # TODO: compiler should check e.g. symbols exist.  Share with parser?
 # TODO: what about an assignment within another expression?
 # TODO: similar for if etc.
@@ -4,7 +4,7 @@ from tests.util.test import test
 
 from pycell.lexer import lex
 from pycell.parser import parse
-from pycell.eval_ import eval_expr, eval_list
+from pycell.eval_ import TailCall, eval_expr, eval_list
 from pycell.env import Env
 
 # --- Utils ---
@@ -144,6 +144,21 @@ def Wrong_number_of_arguments_to_a_function_is_an_error():
     )
 
 
+@test
+def Calling_a_nonfunction_is_an_error():
+    assert_prog_fails(
+        "3();",
+        "Attempted to call something that is not a function: ('number', 3.0)"
+    )
+    env = Env()
+    env.set("None", ("none",))
+    assert_prog_fails(
+        "x = None; x();",
+        "Attempted to call something that is not a function: ('none',)",
+        env
+    )
+
+
 @test
 def Wrong_number_of_arguments_to_a_native_function_is_an_error():
     def native_fn0(env):
@@ -236,3 +251,38 @@ def A_closure_holds_updateable_values():
         ),
         equals(("number", 2))
     )
+
+
+@test
+def A_native_can_return_a_tail_call():
+    def call_it(env, fn):
+        return TailCall(("call", ("symbol", "f"), []), env)
+    env = Env()
+    env.set("call_it", ("native", call_it))
+    assert_that(
+        evald("f = {7;}; call_it(f);", env),
+        equals(("number", 7))
+    )
+
+
+@test
+def Variadic_native_function_takes_any_number_of_arguments():
+    def count_args(env, *args):
+        return ("number", len(args))
+    env = Env()
+    env.set("count_args", ("native", count_args))
+    assert_that(evald("count_args();", env), equals(("number", 0)))
+    assert_that(evald("count_args(1, 2, 3);", env), equals(("number", 3)))
+
+
+@test
+def Native_arity_stored_in_the_value_is_used():
+    def native_fn(env, *args):
+        return ("number", 12)
+    env = Env()
+    env.set("native_fn1", ("native", native_fn, 1))
+    assert_prog_fails(
+        "native_fn1(3, 2);",
+        "2 arguments passed to function ('symbol', 'native_fn1'), but it requires 1 arguments.",
+        env
+    )
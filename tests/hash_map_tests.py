@@ -0,0 +1,65 @@
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.hash_map import HashMap
+
+
+class _SameHash:
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 7
+
+    def __eq__(self, other):
+        return self.name == other.name
+
+
+@test
+def Empty_map_has_no_items():
+    assert_that(len(HashMap()), equals(0))
+    assert_that(HashMap().get("a"), equals(None))
+
+
+@test
+def Putting_leaves_the_original_unchanged():
+    m1 = HashMap().put("a", 1)
+    m2 = m1.put("a", 2).put("b", 3)
+    assert_that(m1.get("a"), equals(1))
+    assert_that(len(m1), equals(1))
+    assert_that(m2.get("a"), equals(2))
+    assert_that(len(m2), equals(2))
+
+
+@test
+def Large_maps_find_every_key():
+    m = HashMap()
+    for i in range(5000):
+        m = m.put(("number", float(i)), i)
+    assert_that(len(m), equals(5000))
+    assert_that(
+        all(m.get(("number", float(i))) == i for i in range(5000)),
+        equals(True)
+    )
+    assert_that(sorted(k[1] for k in m), equals(list(range(5000))))
+
+
+@test
+def Keys_with_the_same_hash_are_kept_apart():
+    m = HashMap()
+    for name in "abc":
+        m = m.put(_SameHash(name), name)
+    m = m.put(_SameHash("b"), "B")
+    assert_that(len(m), equals(3))
+    assert_that(m.get(_SameHash("b")), equals("B"))
+    assert_that(m.get(_SameHash("d")), equals(None))
+
+
+@test
+def Maps_with_the_same_items_are_equal():
+    assert_that(
+        HashMap().put("a", 1).put("b", 2),
+        equals(HashMap().put("b", 2).put("a", 1))
+    )
+    assert_that(
+        HashMap().put("a", 1) == HashMap().put("a", 2), equals(False))
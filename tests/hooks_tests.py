@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from tests.util.asserts import assert_that, assert_fails, equals
+from tests.util.test import test
+
+import pycell.eval_
+
+from pycell.hooks import Hooks
+from pycell.run import run
+
+
+# --- Utils ---
+
+
+class Recorder(Hooks):
+    def __init__(self):
+        self.events = []
+
+    def enter_function(self, fn, args):
+        self.events.append(("enter", args))
+
+    def exit_function(self, fn, value):
+        self.events.append(("exit", value))
+
+    def enter_native(self, fn, args):
+        self.events.append(("enter_native", args))
+
+    def exit_native(self, fn, value):
+        self.events.append(("exit_native", value))
+
+    def assign(self, name, value, env):
+        self.events.append(("assign", name, value[0]))
+
+    def set(self, name, value, env):
+        self.events.append(("set", name, value))
+
+
+def events(program):
+    d = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(d, "prog.cell")
+        with open(filename, "w") as f:
+            f.write(program)
+        hooks = Recorder()
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                filename, stdin, stdout, stdout, optimise=False, cache=False,
+                hooks=hooks
+            )
+        return hooks.events
+    finally:
+        shutil.rmtree(d)
+
+
+def n(x):
+    return ("number", float(x))
+
+
+# --- Tests ---
+
+
+@test
+def Hooks_hear_about_calls_and_assignments():
+    assert_that(
+        events("f = {:(x) x * 2;}; y = f(3);"),
+        equals([
+            ("assign", "f", "function"),
+            ("enter", [n(3)]),
+            ("exit", n(6)),
+            ("assign", "y", "number"),
+        ])
+    )
+
+
+@test
+def Hooks_hear_about_natives_and_set():
+    assert_that(
+        events('x = 1; set("x", 2);'),
+        equals([
+            ("assign", "x", "number"),
+            ("enter_native", [("string", "x"), n(2)]),
+            ("exit_native", n(2)),
+            ("set", "x", n(2)),
+        ])
+    )
+
+
+@test
+def A_tail_call_exits_the_function_without_a_value():
+    assert_that(
+        events("g = {5;}; f = {g();}; f();")[2:],
+        equals([
+            ("enter", []),
+            ("exit", None),
+            ("enter", []),
+            ("exit", n(5)),
+        ])
+    )
+
+
+@test
+def Calling_a_nonfunction_with_hooks_is_an_error():
+    assert_fails(
+        "Attempted to call something that is not a function: ('none',)",
+        events,
+        "x = None; x();"
+    )
+
+
+@test
+def After_running_the_engine_goes_back_to_its_plain_loop():
+    events("f = {3;}; f();")
+    assert_that(
+        pycell.eval_.eval_expr, equals(pycell.eval_._plain_eval_expr))
+    assert_that(
+        pycell.eval_._function_call,
+        equals(pycell.eval_._plain_function_call)
+    )
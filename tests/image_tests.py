@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+import pycell.library
+
+from pycell.image import load_image, save_image
+from pycell.run import run
+
+
+# --- Utils ---
+
+
+def save_then_run(setup, main, save_engine="tree", run_engine="tree"):
+    d = tempfile.mkdtemp()
+    try:
+        setup_file = os.path.join(d, "setup.cell")
+        main_file = os.path.join(d, "main.cell")
+        image_file = os.path.join(d, "out.cellimg")
+        with open(setup_file, "w") as f:
+            f.write(setup)
+        with open(main_file, "w") as f:
+            f.write(main)
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                setup_file, stdin, stdout, stdout, save_engine,
+                cache=False, save_image=image_file
+            )
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                main_file, stdin, stdout, stdout, run_engine,
+                cache=False, image=image_file
+            )
+            return stdout.getvalue()
+    finally:
+        shutil.rmtree(d)
+
+
+counter_setup = """
+make_counter = {
+    count = 0;
+    pair({set("count", count + 1);}, {count;});
+};
+c = make_counter();
+inc = first(c);
+get = second(c);
+inc();
+"""
+
+counter_main = """
+inc();
+print(get());
+"""
+
+
+# --- Tests ---
+
+
+@test
+def Functions_sharing_a_symbol_still_share_it_after_loading():
+    assert_that(save_then_run(counter_setup, counter_main), equals("2\n"))
+
+
+@test
+def Images_can_be_loaded_by_a_different_engine():
+    for save_engine, run_engine in (("closures", "vm"), ("vm", "closures")):
+        assert_that(
+            save_then_run(counter_setup, counter_main, save_engine, run_engine),
+            equals("2\n")
+        )
+
+
+@test
+def Data_structures_survive_saving():
+    assert_that(
+        save_then_run(
+            """
+            m = map_put(map_new(), "k", "v");
+            v = push(vec(1), 2);
+            l = list(1, 2, 3);
+            """,
+            'print(map_get(m, "k")); print(nth(v, 1)); print(first(second(l)));'
+        ),
+        equals("v\n2\n2\n")
+    )
+
+
+@test
+def Natives_are_loaded_by_name_and_streams_replaced():
+    d = tempfile.mkdtemp()
+    try:
+        image_file = os.path.join(d, "out.cellimg")
+        with StringIO() as stdin, StringIO() as stdout:
+            from pycell.env import Env
+            env = Env(stdin=stdin, stdout=stdout, stderr=stdout)
+            pycell.library.import_(env)
+            save_image(image_file, env)
+        new_stdout = StringIO()
+        env = load_image(image_file, None, new_stdout, None)
+        assert_that(env.get("print"), equals(pycell.library.natives["print"]))
+        assert_that(env.stdout is new_stdout, equals(True))
+    finally:
+        shutil.rmtree(d)
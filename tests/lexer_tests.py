@@ -4,7 +4,7 @@ from tests.util.test import test
 from tests.util.system_test import system_test
 from tests.util.all_examples import all_examples
 
-from pycell.lexer import lex
+from pycell.lexer import lex, lex_chunks
 
 # --- Utils ---
 
@@ -245,6 +245,84 @@ def Tabs_are_an_error():
         assert_that(str(e), equals("Tab characters are not allowed in Cell."))
 
 
+# --- Lexing in chunks and one character at a time ---
+
+
+def lexed_all_ways(inp):
+    """
+    Lex inp as a whole string, one character at a time, and in chunks of
+    a few sizes, and check they all give the same tokens (or error).
+    """
+    def tokens_or_error(tokens):
+        ret = []
+        try:
+            for token in tokens:
+                ret.append(token)
+        except Exception as e:
+            ret.append(("error", str(e)))
+        return ret
+
+    ret = tokens_or_error(lex(inp))
+    assert_that(tokens_or_error(lex(iter(inp))), equals(ret))
+    for size in (1, 2, 3, 7):
+        assert_that(
+            tokens_or_error(
+                lex_chunks(inp[i:i + size] for i in range(0, len(inp), size))
+            ),
+            equals(ret)
+        )
+    return ret
+
+
+@test
+def Tokens_split_across_chunks_are_joined():
+    assert_that(
+        lexed_all_ways("foo_bar = 12.5 + 'a b';"),
+        equals(
+            [
+                ("symbol", "foo_bar"),
+                ("=", ""),
+                ("number", "12.5"),
+                ("operation", "+"),
+                ("string", "a b"),
+                (";", ""),
+            ]
+        )
+    )
+
+
+@test
+def Errors_are_the_same_however_the_program_is_read():
+    assert_that(
+        lexed_all_ways("x = 'abc"),
+        equals(
+            [
+                ("symbol", "x"),
+                ("=", ""),
+                ("error", "A string ran off the end of the program."),
+            ]
+        )
+    )
+    assert_that(
+        lexed_all_ways("x\ty"),
+        equals(
+            [
+                ("symbol", "x"),
+                ("error", "Tab characters are not allowed in Cell."),
+            ]
+        )
+    )
+    assert_that(
+        lexed_all_ways("a ? b"),
+        equals(
+            [
+                ("symbol", "a"),
+                ("error", "Unrecognised character: '?'."),
+            ]
+        )
+    )
+
+
 # --- Example programs ---
 
 
@@ -254,3 +332,16 @@ def All_examples_lex():
     for example in all_examples():
         with open(example, encoding="ascii") as f:
             lexed(chars_in_file(f))
+
+
+@system_test
+def All_examples_lex_the_same_when_read_in_chunks():
+    from pycell.chars_in_file import chars_in_file, chunks_in_file
+    for example in all_examples():
+        with open(example, encoding="ascii") as f:
+            expected = lexed(chars_in_file(f))
+        with open(example, encoding="ascii") as f:
+            assert_that(
+                list(lex_chunks(chunks_in_file(f, chunk_size=5))),
+                equals(expected)
+            )
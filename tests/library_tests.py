@@ -4,6 +4,7 @@ from io import StringIO
 from tests.util.asserts import assert_that, assert_fails, equals
 from tests.util.test import test
 
+from pycell.engines import engine, engine_names
 from pycell.env import Env
 from pycell.eval_ import eval_list
 from pycell.lexer import lex
@@ -303,3 +304,300 @@ def Concat_a_string_with_an_empty_makes_the_string():
 @test
 def Concat_two_strings_sticks_them_together():
     assert_that(evald("concat('foo', 'bar');"), equals(evald("'foobar';")))
+
+
+@test
+def For_loops_through_a_long_list_without_running_out_of_stack():
+    assert_that(
+        evald(
+            """
+            build = {:(n, acc)
+                if(equals(n, 0), {acc;}, {build(n - 1, prepend(n, acc));});
+            };
+            total = 0;
+            for(build(3000, None), {:(x) set("total", total + x);});
+            total;
+            """
+        ),
+        equals(evald("4501500;"))
+    )
+
+
+@test
+def Registered_natives_know_their_arity():
+    assert_that(pycell.library.natives["if"][2], equals(3))
+    assert_that(pycell.library.natives["equals"][2], equals(2))
+    assert_that(
+        pycell.library.native(lambda env, *args: None)[2],
+        equals(None)
+    )
+
+
+@test
+def Natives_can_be_bound_methods():
+    class Counter:
+        def __init__(self):
+            self.count = 0
+
+        def add(self, env, n):
+            self.count += n[1]
+            return ("number", self.count)
+
+    counter = Counter()
+    assert_that(pycell.library.native(counter.add)[2], equals(1))
+    env = Env()
+    pycell.library.import_(env)
+    env.set("add", pycell.library.native(counter.add))
+    assert_that(
+        eval_list(parse(lex("add(2); add(3);")), env),
+        equals(("number", 5))
+    )
+
+
+@test
+def Assignments_in_an_if_branch_stay_inside_it():
+    assert_that(
+        evald('x = "outer"; if(1, {x = "inner"; x;}, {}); x;'),
+        equals(evald('"outer";'))
+    )
+
+
+@test
+def If_can_be_called_through_another_name():
+    assert_that(
+        evald('myif = if; myif(0, {"t";}, {"f";});'),
+        equals(evald('"f";'))
+    )
+
+
+@test
+def If_can_be_given_branches_that_are_not_written_inline():
+    assert_that(
+        evald('t = {"t";}; f = {"f";}; if(1, t, f);'),
+        equals(evald('"t";'))
+    )
+
+
+@test
+def If_calls_a_function_value_in_the_environment_it_was_made_in():
+    program = """
+        make = {:(x) {x;};};
+        g = make(5);
+        h = {:(x) if(1, g, g);};
+        h(7);
+    """
+    for engine_name in engine_names():
+        env = Env()
+        pycell.library.import_(env, engine_name)
+        assert_that(
+            engine(engine_name).eval_list(parse(lex(program)), env),
+            equals(("number", 5))
+        )
+
+
+@test
+def A_shadowed_if_is_called_normally():
+    assert_that(
+        evald('{:(if) if(1, {"t";}, {"f";});}({:(a, b, c) "mine";});'),
+        equals(evald('"mine";'))
+    )
+
+
+@test
+def List_makes_a_list_of_any_length():
+    assert_that(evald("list();"), equals(evald("None;")))
+    assert_that(
+        evald("list(1, 2, 3);"),
+        equals(evald("pair(1, pair(2, pair(3, None)));"))
+    )
+    assert_that(
+        evald("list5(1, 2, 3, 4, 5);"),
+        equals(evald("list(1, 2, 3, 4, 5);"))
+    )
+
+
+@test
+def First_of_something_that_is_not_a_pair_is_an_error():
+    assert_fails(
+        "first() must be given a pair, but was given: ('number', 3.0)",
+        evald,
+        "first(3);"
+    )
+
+
+@test
+def A_list_is_not_equal_to_None():
+    assert_that(evald("equals(list1(1), None);"), equals(evald("0;")))
+    assert_that(evald("equals(list0(), None);"), equals(evald("1;")))
+
+
+@test
+def Long_lists_with_equal_contents_are_equal():
+    program = """
+        build = {:(lst, n)
+            if(equals(n, 0), {lst;}, {build(pair(n, lst), n - 1);});
+        };
+        a = build(None, 5000);
+        equals(a, build(None, 5000));
+    """
+    assert_that(evald(program), equals(evald("1;")))
+    assert_that(
+        evald(program.replace("build(None, 5000));", "build(None, 4999));")),
+        equals(evald("0;"))
+    )
+
+
+@test
+def Printing_a_pair_says_it_is_a_pair():
+    stdout = StringIO()
+    evald('print(pair(1, 2));', stdout=stdout)
+    assert_that(stdout.getvalue(), equals("<pair>\n"))
+
+
+@test
+def Vectors_can_be_pushed_to_and_indexed():
+    assert_that(evald("vlen(push(vec(1, 2), 3));"), equals(evald("3;")))
+    assert_that(type(evald("vlen(vec(1));")[1]), equals(float))
+    assert_that(evald("nth(push(vec(1, 2), 3), 2);"), equals(evald("3;")))
+    assert_that(evald("nth(vec(1, 2), 2);"), equals(evald("None;")))
+    assert_that(
+        evald("vslice(vec(1, 2, 3, 4), 1, 3);"),
+        equals(evald("vec(2, 3);"))
+    )
+
+
+@test
+def For_loops_through_a_vector():
+    stdout = StringIO()
+    evald(
+        """
+        v = push(vec(), "a");
+        for(vseq(push(v, "b")), {:(x) print(x);});
+        for(vseq(vec()), {:(x) print(x);});
+        """,
+        stdout=stdout
+    )
+    assert_that(stdout.getvalue(), equals("a\nb\n"))
+
+
+@test
+def Maps_look_up_what_was_put_in():
+    assert_that(
+        evald('map_get(map_put(map_new(), "a", 3), "a");'),
+        equals(evald("3;"))
+    )
+    assert_that(
+        evald('map_get(map_put(map_new(), 1, 3), "1");'),
+        equals(evald("None;"))
+    )
+    assert_that(
+        evald('map_has(map_put(map_new(), 1, 3), 1);'), equals(evald("1;")))
+    assert_that(
+        evald('map_len(map_put(map_put(map_new(), 1, 3), 1, 4));'),
+        equals(evald("1;"))
+    )
+    assert_that(type(evald("map_len(map_new());")[1]), equals(float))
+
+
+@test
+def Maps_can_only_have_strings_and_numbers_as_keys():
+    assert_fails(
+        "map_put() keys must be strings or numbers, but was given: ('none',)",
+        evald,
+        "map_put(map_new(), None, 1);"
+    )
+
+
+@test
+def String_builders_build_strings():
+    assert_that(
+        evald('sb_str(sb_append(sb_append(sb_new(), "ab"), "cd"));'),
+        equals(evald('"abcd";'))
+    )
+    assert_that(
+        evald('len(sb_append(sb_append(sb_new(), "ab"), "cd"));'),
+        equals(evald('4;'))
+    )
+    assert_that(
+        evald('char_at(2, sb_append(sb_append(sb_new(), "ab"), "cd"));'),
+        equals(evald('"c";'))
+    )
+    assert_that(
+        evald('char_at(4, sb_append(sb_new(), "ab"));'),
+        equals(evald('None;'))
+    )
+
+
+@test
+def Appending_to_an_old_string_builder_leaves_newer_ones_alone():
+    assert_that(
+        evald(
+            """
+            b = sb_append(sb_new(), "a");
+            c = sb_append(b, "c");
+            d = sb_append(b, "d");
+            sb_str(c);
+            """
+        ),
+        equals(evald('"ac";'))
+    )
+
+
+@test
+def Printing_a_string_builder_prints_its_contents():
+    stdout = StringIO()
+    evald('print(sb_append(sb_append(sb_new(), "x"), "y"));', stdout=stdout)
+    assert_that(stdout.getvalue(), equals("xy\n"))
+
+
+@test
+def Chars_in_works_for_long_strings():
+    assert_that(
+        evald(
+            """
+            count = 0;
+            for(chars_in(s), {:(ch) set("count", count + 1);});
+            count;
+            """.replace("s)", "'%s')" % ("x" * 5000))
+        ),
+        equals(evald("5000;"))
+    )
+
+
+@test
+def Split_and_join_are_opposites():
+    assert_that(
+        evald('split("a,b,,c", ",");'),
+        equals(evald('list("a", "b", "", "c");'))
+    )
+    assert_that(
+        evald('join(split("a,b,,c", ","), ",");'),
+        equals(evald('"a,b,,c";'))
+    )
+    assert_that(evald('join(chars_in("abc"), "-");'), equals(evald('"a-b-c";')))
+    assert_that(evald('join(None, "-");'), equals(evald('"";')))
+
+
+@test
+def Substring_and_find_work_with_positions():
+    assert_that(evald('substring("abcdef", 1, 3);'), equals(evald('"bc";')))
+    assert_that(evald('substring("abc", 2, 10);'), equals(evald('"c";')))
+    assert_that(evald('find("abcdef", "cd");'), equals(evald('2;')))
+    assert_that(evald('find("abcdef", "x");'), equals(evald('None;')))
+    assert_that(evald('starts_with("abc", "ab");'), equals(evald('1;')))
+    assert_that(evald('starts_with("abc", "b");'), equals(evald('0;')))
+
+
+@test
+def Numbers_and_strings_can_be_converted():
+    assert_that(evald('to_number("-1.5");'), equals(evald('0 - 1.5;')))
+    assert_that(evald('to_number("x");'), equals(evald('None;')))
+    assert_that(evald('to_string(12);'), equals(evald('"12";')))
+    assert_that(evald('to_string(None);'), equals(evald('"None";')))
+
+
+@test
+def The_prebuilt_prologue_is_up_to_date():
+    from pycell.prologue.build import ast_file, module_source
+    with open(ast_file) as f:
+        assert_that(f.read(), equals(module_source()))
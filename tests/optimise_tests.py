@@ -0,0 +1,126 @@
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.compile_ import compile_list
+from pycell.env import Env
+from pycell.lexer import lex
+from pycell.optimise import optimise
+from pycell.parser import parse
+
+# --- Utils ---
+
+def optimised(inp, fold_prologue=True):
+    return optimise(parse(lex(inp)), fold_prologue)
+
+
+# --- Tests ---
+
+
+@test
+def Literals_become_constants():
+    assert_that(
+        optimised("3; 'x';"),
+        equals([
+            ("constant", ("number", 3.0)),
+            ("constant", ("string", "x")),
+        ])
+    )
+
+
+@test
+def Arithmetic_on_constants_is_folded():
+    assert_that(
+        optimised("2 * 3 + 4;"),
+        equals([("constant", ("number", 14.0))])
+    )
+
+
+@test
+def Arithmetic_on_symbols_is_not_folded():
+    assert_that(
+        optimised("x + 1;"),
+        equals([
+            ("operation", "+", ("symbol", "x"), ("constant", ("number", 1.0)))
+        ])
+    )
+
+
+@test
+def Dividing_by_zero_is_left_until_runtime():
+    assert_that(
+        optimised("1 / 0;"),
+        equals([
+            (
+                "operation",
+                "/",
+                ("constant", ("number", 1.0)),
+                ("constant", ("number", 0.0)),
+            )
+        ])
+    )
+
+
+@test
+def Equals_on_constants_is_folded():
+    assert_that(
+        optimised("equals(1, 1); equals('a', 1);"),
+        equals([
+            ("constant", ("number", 1)),
+            ("constant", ("number", 0)),
+        ])
+    )
+
+
+@test
+def If_on_a_constant_calls_the_chosen_branch():
+    assert_that(
+        optimised("if(equals(2, 2), {'y';}, {'n';});"),
+        equals([
+            ("call", ("function", [], [("constant", ("string", "y"))]), [])
+        ])
+    )
+
+
+@test
+def Prologue_calls_are_not_folded_if_they_could_be_shadowed():
+    unfolded = [
+        (
+            "call",
+            ("symbol", "equals"),
+            [("constant", ("number", 1.0)), ("constant", ("number", 1.0))]
+        )
+    ]
+    assert_that(optimised("equals(1, 1);", False), equals(unfolded))
+    assert_that(
+        optimised("{:(equals) 3;}; equals(1, 1);")[1],
+        equals(unfolded[0])
+    )
+    assert_that(
+        optimised("set('equals', 3); equals(1, 1);")[1],
+        equals(unfolded[0])
+    )
+    assert_that(
+        optimised("s = set; equals(1, 1);")[1],
+        equals(unfolded[0])
+    )
+
+
+@test
+def Constants_compile_to_javascript():
+    assert_that(
+        compile_list(optimised("x = 2 + 0.5; \"it's\";"), Env()),
+        equals("var x = 2.5;\n'it\\'s';\n")
+    )
+
+
+@test
+def Deeply_nested_expressions_are_optimised_without_using_up_the_python_stack():
+    assert_that(
+        optimised("1 + " * 10000 + "1;"),
+        equals([("constant", ("number", 10001.0))])
+    )
+
+    fn = optimised("{" * 3000 + "1 + 1;" + "};" * 3000)[0]
+    for _ in range(2999):
+        fn = fn[2][0]
+    assert_that(fn[2], equals([("constant", ("number", 2.0))]))
@@ -363,6 +363,51 @@ def A_complex_example_program_parses():
     parsed(example)
 
 
+@test
+def Long_chains_of_operations_parse_without_running_out_of_stack():
+    expr = parsed("x = " + " + ".join(["1"] * 10000) + ";")[0]
+    depth = 0
+    while expr[0] != "number":
+        expr = expr[-1]
+        depth += 1
+    assert_that(depth, equals(10000))
+
+
+@test
+def Long_chains_of_calls_parse_without_running_out_of_stack():
+    expr = parsed("f" + "(1)" * 10000 + ";")[0]
+    depth = 0
+    while expr[0] == "call":
+        assert_that(expr[2], equals([("number", "1")]))
+        expr = expr[1]
+        depth += 1
+    assert_that(depth, equals(10000))
+
+
+@test
+def Deeply_nested_functions_parse_without_running_out_of_stack():
+    expr = parsed("{" * 5000 + "}" * 5000 + ";")[0]
+    depth = 1
+    while len(expr[2]) > 0:
+        expr = expr[2][0]
+        depth += 1
+    assert_that(depth, equals(5000))
+
+
+@test
+def Unfinished_argument_list_is_an_error():
+    try:
+        parsed("f(1")
+        fail("Should throw")
+    except Exception as e:
+        assert_that(str(e), equals("Hit end of file - expected ';'."))
+    try:
+        parsed("f(1)")
+        fail("Should throw")
+    except Exception as e:
+        assert_that(str(e), equals("Hit end of file - expected ')'."))
+
+
 # --- Example programs ---
 
 
@@ -0,0 +1,123 @@
+import marshal
+import os
+import pstats
+import shutil
+import tempfile
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+import pycell.eval_
+
+from pycell.profiler import Profiler
+from pycell.run import run
+
+
+# --- Utils ---
+
+
+class FakeClock:
+    """
+    A clock that moves on by one second each time it is read.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+def profiled(program, engine="tree"):
+    d = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(d, "prog.cell")
+        with open(filename, "w") as f:
+            f.write(program)
+        profiler = Profiler(FakeClock())
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                filename, stdin, stdout, stdout, engine, cache=False,
+                hooks=profiler
+            )
+        return profiler
+    finally:
+        shutil.rmtree(d)
+
+
+def calls(table):
+    return {name: stats.calls for name, stats in table.items()}
+
+
+# --- Tests ---
+
+
+@test
+def Calls_to_functions_and_natives_are_counted_by_name():
+    profiler = profiled(
+        """
+        count = {:(n) if(equals(n, 0), {0;}, {1 + count(n - 1);});};
+        count(5);
+        twice = {:(f) {:(x) f(f(x));};};
+        twice({:(x) x * 2;})(3);
+        """
+    )
+    assert_that(
+        calls(profiler.functions),
+        equals({"count": 6, "twice": 1, "twice.{1}": 1, "{1}": 2})
+    )
+    assert_that(calls(profiler.natives), equals({"equals": 6}))
+
+
+@test
+def Recursive_calls_are_counted_once_in_inclusive_time():
+    # enter and exit each read the clock once, so each call takes one
+    # second longer than the calls it makes.
+    profiler = profiled(
+        "count = {:(n) if(equals(n, 0), {0;}, {1 + count(n - 1);});};"
+        "count(1);"
+    )
+    count = profiler.functions["count"]
+    equals_ = profiler.natives["equals"]
+    # count(1) runs from 1 to 8: equals from 2 to 3, count(0) from 4 to 7,
+    # within which equals runs from 5 to 6.
+    assert_that(count.inclusive, equals(7.0))
+    assert_that(count.exclusive, equals(5.0))
+    assert_that(equals_.exclusive, equals(2.0))
+
+
+@test
+def Profiling_stops_after_the_program_finishes():
+    profiled("x = 3;")
+    assert_that(
+        pycell.eval_._function_call,
+        equals(pycell.eval_._plain_function_call)
+    )
+    assert_that(
+        pycell.eval_.eval_expr, equals(pycell.eval_._plain_eval_expr))
+
+
+@test
+def Profiles_can_be_loaded_by_pstats():
+    profiler = profiled("sq = {:(x) x * x;}; sq(2); sq(3);")
+    d = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(d, "out.prof")
+        profiler.write_pstats(filename)
+        stats = pstats.Stats(filename)
+        assert_that(stats.stats[("<cell>", 0, "sq")][:2], equals((2, 2)))
+        with open(filename, "rb") as f:
+            assert_that(marshal.load(f), equals(profiler.pstats_dict()))
+    finally:
+        shutil.rmtree(d)
+
+
+@test
+def Report_lists_the_most_expensive_functions_first():
+    profiler = profiled("a = {3;}; b = {a(); a(); 4;}; b();")
+    out = StringIO()
+    profiler.report(out)
+    lines = out.getvalue().split("\n")
+    assert_that(
+        [line.split()[-1] for line in lines[2:4]], equals(["b", "a"]))
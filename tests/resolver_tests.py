@@ -0,0 +1,97 @@
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.env import Env
+from pycell.lexer import lex
+from pycell.parser import parse
+from pycell.resolver import resolve
+
+# --- Utils ---
+
+def resolved(inp, env=None, closed=True):
+    if env is None:
+        env = Env()
+    return resolve(list(parse(lex(inp))), env, closed)
+
+
+def body_of(fn):
+    return fn[2]
+
+
+# --- Tests ---
+
+
+@test
+def Top_level_symbols_are_found_by_name():
+    assert_that(
+        resolved("x = 3; x;"),
+        equals([
+            ("assignment", ("symbol", "x", 0, None), ("number", "3")),
+            ("symbol", "x", 0, None),
+        ])
+    )
+
+
+@test
+def Symbols_defined_in_the_env_are_known():
+    env = Env()
+    env.set("y", ("number", 1))
+    assert_that(resolved("y;", env), equals([("symbol", "y", 0, None)]))
+
+
+@test
+def Symbols_that_can_never_be_found_are_unknown():
+    assert_that(resolved("x;"), equals([("unknown", "x")]))
+
+
+@test
+def Symbols_are_looked_up_at_runtime_if_more_code_may_come():
+    assert_that(
+        resolved("x;", closed=False),
+        equals([("symbol", "x", None, None)])
+    )
+
+
+@test
+def Parameters_and_locals_get_slots_in_order():
+    fn = resolved("{:(a, b) c = a; b; c;};")[0]
+    assert_that(fn[3].names, equals(["a", "b", "c"]))
+    assert_that(
+        body_of(fn),
+        equals([
+            ("assignment", ("symbol", "c", 0, 2), ("symbol", "a", 0, 0)),
+            ("symbol", "b", 0, 1),
+            ("symbol", "c", 0, 2),
+        ])
+    )
+
+
+@test
+def Symbols_from_enclosing_functions_have_a_depth():
+    outer = resolved("{:(a) {:(b) a; b; g;};}; g = 1;")[0]
+    inner = body_of(outer)[0]
+    assert_that(
+        body_of(inner),
+        equals([
+            ("symbol", "a", 1, 0),
+            ("symbol", "b", 0, 0),
+            ("symbol", "g", 2, None),
+        ])
+    )
+
+
+@test
+def Calls_keep_their_original_function_expression():
+    call = resolved("f = {}; f();")[1]
+    assert_that(call[3], equals(("symbol", "f")))
+
+
+@test
+def Deeply_nested_expressions_resolve_without_using_up_the_python_stack():
+    chain = resolved("x = 1;" + "x + " * 10000 + "x;")[1]
+    assert_that(chain[2], equals(("symbol", "x", 0, None)))
+
+    fn = resolved("{" * 3000 + "a;" + "};" * 3000, closed=False)[0]
+    for _ in range(2999):
+        fn = body_of(fn)[0]
+    assert_that(body_of(fn), equals([("symbol", "a", None, None)]))
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.hooks import Hooks
+from pycell.run import run
+from pycell.sample_profiler import SampleProfiler
+
+
+# --- Utils ---
+
+
+def run_with(profiler, program):
+    d = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(d, "prog.cell")
+        with open(filename, "w") as f:
+            f.write(program)
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                filename, stdin, stdout, stdout, cache=False,
+                hooks=profiler
+            )
+    finally:
+        shutil.rmtree(d)
+
+
+class SamplingEveryCall(SampleProfiler):
+    """
+    Takes a sample whenever a function or native is called, instead of
+    using a thread.
+    """
+    def start(self):
+        Hooks.start(self)
+
+    def stop(self):
+        Hooks.stop(self)
+
+    def enter_function(self, fn, args):
+        SampleProfiler.enter_function(self, fn, args)
+        self.sample()
+
+    def enter_native(self, fn, args):
+        SampleProfiler.enter_native(self, fn, args)
+        self.sample()
+
+
+# --- Tests ---
+
+
+@test
+def Stack_holds_the_names_of_running_functions_and_natives():
+    profiler = SamplingEveryCall()
+    run_with(
+        profiler,
+        """
+        outer = {:(f) inner = {f(); 1;}; inner(); 2;};
+        outer({print("x");});
+        """
+    )
+    assert_that(
+        sorted(profiler.samples),
+        equals([
+            ("outer",),
+            ("outer", "outer.inner"),
+            ("outer", "outer.inner", "{1}"),
+            ("outer", "outer.inner", "{1}", "print"),
+        ])
+    )
+    assert_that(profiler.stack, equals([]))
+
+
+@test
+def Tail_calls_replace_the_function_on_the_stack():
+    profiler = SamplingEveryCall()
+    run_with(profiler, 'a = {print("x");}; b = {a();}; b();')
+    assert_that(
+        sorted(profiler.samples),
+        equals([("a",), ("a", "print"), ("b",)])
+    )
+
+
+@test
+def Samples_are_written_as_collapsed_stacks():
+    profiler = SampleProfiler()
+    profiler.stack = ["main", "fib"]
+    profiler.sample()
+    profiler.sample()
+    profiler.stack.append("equals")
+    profiler.sample()
+    out = StringIO()
+    profiler.write_folded(out)
+    assert_that(out.getvalue(), equals("main;fib 2\nmain;fib;equals 1\n"))
+
+
+@test
+def The_sampling_thread_samples_until_stopped():
+    profiler = SampleProfiler(interval=0.001)
+    profiler.stack = ["busy"]
+    profiler.start()
+    try:
+        deadline = time.time() + 5
+        while len(profiler.samples) == 0 and time.time() < deadline:
+            time.sleep(0.001)
+    finally:
+        profiler.stop()
+    assert_that(list(profiler.samples), equals([("busy",)]))
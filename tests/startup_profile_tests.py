@@ -0,0 +1,25 @@
+import sys
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.startup_profile import ImportProfile
+
+
+@test
+def Imports_while_profiling_are_timed_and_reported():
+    sys.modules.pop("colorsys", None)
+    profile = ImportProfile()
+    profile.start()
+    try:
+        import colorsys
+    finally:
+        profile.stop()
+    assert_that(
+        [name for _, name, _, _ in profile.imports], equals(["colorsys"]))
+    assert_that(profile in sys.meta_path, equals(False))
+
+    out = StringIO()
+    profile.report(out)
+    assert_that("colorsys\n" in out.getvalue(), equals(True))
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.env import Env
+from pycell.run import run
+from pycell.stats import Stats
+
+
+def stats_for(program):
+    d = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(d, "prog.cell")
+        with open(filename, "w") as f:
+            f.write(program)
+        stats = Stats()
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                filename, stdin, stdout, stdout, optimise=False, cache=False,
+                hooks=stats
+            )
+        return stats
+    finally:
+        shutil.rmtree(d)
+
+
+@test
+def Stats_count_envs_functions_and_calls():
+    env_init = Env.__init__
+    stats = stats_for(
+        """
+        outer = {:(f) f(2);};
+        outer({:(x) equals(x, 2);});
+        """
+    )
+    # Each function value has an Env, and so does each call
+    assert_that(stats.envs, equals(4))
+    assert_that(stats.functions, equals(2))
+    assert_that(stats.function_calls, equals(2))
+    assert_that(stats.native_calls, equals(1))
+    assert_that(stats.max_depth, equals(2))
+    assert_that(Env.__init__, equals(env_init))
+
+
+@test
+def Stats_report_memory_and_garbage_collections():
+    stats = stats_for('x = concat("a", "b");')
+    assert_that(stats.peak_memory > 0, equals(True))
+    assert_that(len(stats.gc_collections), equals(3))
+    out = StringIO()
+    stats.report(out)
+    assert_that("1 native calls\n" in out.getvalue(), equals(True))
@@ -0,0 +1,29 @@
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.string_builder import StringBuilder
+
+
+@test
+def Empty_builder_is_an_empty_string():
+    assert_that(str(StringBuilder()), equals(""))
+    assert_that(len(StringBuilder()), equals(0))
+
+
+@test
+def Appending_to_an_older_builder_copies_its_pieces():
+    b = StringBuilder().append("ab")
+    c = b.append("cd")
+    d = b.append("ef")
+    assert_that(str(b), equals("ab"))
+    assert_that(str(c), equals("abcd"))
+    assert_that(str(d), equals("abef"))
+
+
+@test
+def Characters_are_found_across_pieces():
+    b = StringBuilder().append("ab").append("c").append("def")
+    assert_that(
+        [b.char_at(i) for i in range(len(b))],
+        equals(list("abcdef"))
+    )
@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.run import run
+from pycell.trace import JsonTrace
+
+
+@test
+def Trace_writes_one_json_object_per_event():
+    d = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(d, "prog.cell")
+        with open(filename, "w") as f:
+            f.write('double = {:(x) x * 2;}; print(double(3));')
+        out = StringIO()
+        with StringIO() as stdin, StringIO() as stdout:
+            run(
+                filename, stdin, stdout, stdout, cache=False,
+                hooks=JsonTrace(out)
+            )
+    finally:
+        shutil.rmtree(d)
+    assert_that(
+        [json.loads(line) for line in out.getvalue().splitlines()],
+        equals([
+            {
+                "event": "assign",
+                "name": "double",
+                "value": {"type": "function"},
+                "depth": 0,
+            },
+            {"event": "enter", "function": "double", "args": [3], "depth": 0},
+            {"event": "exit", "function": "double", "value": 6, "depth": 0},
+            {
+                "event": "enter_native",
+                "function": "print",
+                "args": [6],
+                "depth": 0,
+            },
+            {
+                "event": "exit_native",
+                "function": "print",
+                "value": None,
+                "depth": 0,
+            },
+        ])
+    )
@@ -0,0 +1,48 @@
+from tests.util.asserts import assert_that, equals
+from tests.util.test import test
+
+from pycell.vector import Vector
+
+
+@test
+def Empty_vector_has_no_items():
+    assert_that(len(Vector()), equals(0))
+    assert_that(list(Vector()), equals([]))
+
+
+@test
+def Pushing_adds_to_the_end():
+    v = Vector().push("a").push("b")
+    assert_that(list(v), equals(["a", "b"]))
+    assert_that(v.nth(1), equals("b"))
+
+
+@test
+def Pushing_leaves_the_original_unchanged():
+    v1 = Vector.of(range(100))
+    v2 = v1.push(100)
+    assert_that(len(v1), equals(100))
+    assert_that(list(v1), equals(list(range(100))))
+    assert_that(list(v2), equals(list(range(101))))
+
+
+@test
+def Large_vectors_can_be_indexed():
+    v = Vector.of(range(40000))
+    assert_that(len(v), equals(40000))
+    assert_that([v.nth(i) for i in (0, 31, 32, 1055, 1056, 39999)],
+                equals([0, 31, 32, 1055, 1056, 39999]))
+    assert_that(list(v), equals(list(range(40000))))
+
+
+@test
+def Slicing_makes_a_new_vector():
+    v = Vector.of(range(100))
+    assert_that(list(v.slice(30, 40)), equals(list(range(30, 40))))
+    assert_that(len(v.slice(5, 5)), equals(0))
+
+
+@test
+def Vectors_with_the_same_items_are_equal():
+    assert_that(Vector.of([1, 2]), equals(Vector().push(1).push(2)))
+    assert_that(Vector.of([1, 2]) == Vector.of([1, 3]), equals(False))
@@ -0,0 +1,213 @@
+from io import StringIO
+
+from tests.util.asserts import assert_that, assert_fails, equals
+from tests.util.test import test
+from tests.util.system_test import system_test
+from tests.util.all_examples import all_examples
+
+from pycell.bytecode import CONST, RETURN, compile_expr
+from pycell.lexer import lex
+from pycell.parser import parse
+from pycell.vm import eval_list
+from pycell.env import Env
+
+import pycell.library
+
+# --- Utils ---
+
+def evald(inp, env=None):
+    if env is None:
+        env = Env()
+    return eval_list(parse(lex(inp)), env)
+
+
+def runned(inp, stdout=None):
+    env = Env(stdout=stdout)
+    pycell.library.import_(env, "vm")
+    return eval_list(parse(lex(inp)), env)
+
+
+def assert_prog_fails(program, error, env=None):
+    assert_fails(error, evald, program, env)
+
+
+# --- Compiling ---
+
+
+@test
+def A_number_compiles_to_a_constant():
+    code = compile_expr(("number", "3"))
+    assert_that(list(code.ops), equals([CONST, 0, RETURN, 0]))
+    assert_that(code.consts, equals([("number", 3.0)]))
+
+
+@test
+def Repeated_constants_are_shared():
+    code = compile_expr(list(parse(lex("'a' + 'a';")))[0])
+    assert_that(code.consts, equals([("string", "a")]))
+
+
+# --- Evaluating ---
+
+
+@test
+def Evaluating_an_empty_program_gives_none():
+    assert_that(evald(""), equals(("none",)))
+
+
+@test
+def Arithmetic_expressions_come_out_correct():
+    assert_that(evald("3 + 4;"), equals(("number", 7)))
+    assert_that(evald("3 - 4;"), equals(("number", -1)))
+    assert_that(evald("3 * 4;"), equals(("number", 12)))
+    assert_that(evald("3 / 4;"), equals(("number", 0.75)))
+
+
+@test
+def Referring_to_an_unknown_symbol_is_an_error():
+    assert_prog_fails("x;", "Unknown symbol 'x'.")
+
+
+@test
+def Modifying_a_value_is_an_error():
+    assert_prog_fails("x = 30;x = 10;", "Not allowed to re-assign symbol 'x'.")
+
+
+@test
+def Body_of_a_function_can_use_arg_values():
+    assert_that(
+        evald("{:(x, y) x + y;}(100, 1);"),
+        equals(("number", 101))
+    )
+
+
+@test
+def Calling_a_function_returns_its_last_value():
+    assert_that(evald("{10;11;}();"), equals(("number", 11)))
+    assert_that(evald("{}();"), equals(("none",)))
+
+
+@test
+def Wrong_number_of_arguments_to_a_function_is_an_error():
+    assert_prog_fails(
+        "x={:(a, b, c)}; x(3, 2);",
+        "2 arguments passed to function ('symbol', 'x'), but it requires 3 arguments."
+    )
+
+
+@test
+def Native_function_gets_called():
+    def native_fn(env, x, y):
+        return ("number", x[1] + y[1])
+    env = Env()
+    env.set("native_fn", ("native", native_fn))
+    assert_that(evald("native_fn( 2, 8 );", env), equals(("number", 10)))
+
+
+@test
+def If_runs_the_chosen_branch():
+    assert_that(runned('if( 1, {"t";}, {"f";} );'), equals(("string", "t")))
+    assert_that(runned('if( 0, {"t";}, {"f";} );'), equals(("string", "f")))
+
+
+@test
+def If_branches_run_in_the_frame_around_them():
+    assert_that(
+        runned("a = 5; g = if(1, {{a + 1;};}, {0;}); g();"),
+        equals(("number", 6))
+    )
+    assert_that(
+        runned("f = {:(x) if(1, {{:(y) x + y;};}, {0;});}; f(1)(2);"),
+        equals(("number", 3))
+    )
+    assert_that(
+        runned("f = {:(x) if(1, {if(0, {0;}, {{x;};});}, {0;});}; f(4)();"),
+        equals(("number", 4))
+    )
+
+
+@test
+def If_branches_with_locals_get_a_frame_of_their_own():
+    assert_that(
+        runned("f = {:(x) if(1, {y = x + 1; y;}, {0;});}; f(1); f(2);"),
+        equals(("number", 3))
+    )
+
+
+@test
+def A_shadowed_if_is_called_normally():
+    assert_that(
+        runned('{:(if) if(1, {"t";}, {"f";});}({:(a, b, c) "mine";});'),
+        equals(("string", "mine"))
+    )
+    assert_fails(
+        "Attempted to call something that is not a function: ('none',)",
+        runned,
+        "f = {:(if) if(1, {2;}, {3;});}; f(None);"
+    )
+
+
+@test
+def If_needs_a_number():
+    assert_fails(
+        "Only numbers may be passed to an if, but I was passed "
+        + "'('string', 'x')'",
+        runned,
+        'if("x", {1;}, {2;});'
+    )
+
+
+@test
+def Deeply_nested_ifs_are_compiled_once():
+    assert_that(
+        runned(
+            "x = 0;"
+            + "if(equals(x, 1), {1;}, {" * 200
+            + "2;"
+            + "});" * 200
+        ),
+        equals(("number", 2))
+    )
+
+
+@test
+def Set_changes_value_of_symbol_in_outer_scope():
+    assert_that(
+        runned('foo = "bar"; fn = { set("foo", "baz"); }; fn(); foo;'),
+        equals(("string", "baz"))
+    )
+
+
+@test
+def Deep_recursion_does_not_use_up_the_python_stack():
+    assert_that(
+        runned(
+            """
+            count = {:(n) if(equals(n, 0), {0;}, {1 + count(n - 1);});};
+            count(5000);
+            """
+        ),
+        equals(("number", 5000))
+    )
+
+
+@test
+def Deeply_nested_expressions_do_not_use_up_the_python_stack():
+    assert_that(
+        evald("x = 1;" + "x + " * 10000 + "x;"),
+        equals(("number", 10001))
+    )
+    assert_that(
+        evald("{" * 3000 + "3;" + "}();" * 3000),
+        equals(("number", 3))
+    )
+
+
+@system_test
+def All_examples_evaluate():
+    from pycell.run import run
+    for example in all_examples():
+        with StringIO() as stdin, StringIO() as stdout:
+            run(example, stdin, stdout, stdout, engine="vm")
+            with open(example[:-5] + ".output.txt") as outputfile:
+                assert_that(stdout.getvalue(), equals(outputfile.read()))